@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Excel课表导出测试：导出30周（可指定）的总体课表、每周课表和每门课程的课表，
+测量不同已选课程数下的耗时（多次取最短）和tracemalloc记录的内存峰值，耗时超过预算时返回非零退出码
+
+只写模式下写出的行不再保留在内存中，内存峰值只随工作表数（周数加已选课程数）缓慢增长，
+与单元格数量无关。
+
+用法：python benchmarks/bench_export.py [--weeks 30] [--selected 20,100,500] [--budget 秒]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "codes"))
+
+from schedule_core import save_schedule_xlsx  # noqa: E402
+from synthetic_catalog import generate_catalog  # noqa: E402
+
+
+def measure(courses, week_count, filename, repeat=3):
+    """导出若干次，返回 (最短秒数, 内存峰值字节数)；内存单独测一次，tracemalloc会拖慢导出"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        save_schedule_xlsx(filename, courses, (1, week_count))
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        save_schedule_xlsx(filename, courses, (1, week_count))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel课表导出测试")
+    parser.add_argument("--weeks", type=int, default=30, help="学期周数")
+    parser.add_argument("--selected", default="20,100,500", help="已选课程数，逗号分隔")
+    parser.add_argument("--budget", type=float, default=5.0, help="单次导出的时间预算（秒），默认5")
+    parser.add_argument("--repeat", type=int, default=3, help="每种规模导出的次数，取最短耗时")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.selected.split(",")]
+    catalog = generate_catalog(max(sizes), week_count=args.weeks, seed=args.seed)
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "schedule.xlsx")
+        for size in sizes:
+            elapsed, peak = measure(catalog[:size], args.weeks, filename, args.repeat)
+            print(f"{args.weeks}周、{size}门已选课程：{elapsed:.2f} s，内存峰值 {peak / 1024 / 1024:.1f} MB，"
+                  f"文件 {os.path.getsize(filename) / 1024:.0f} KB")
+            failed |= elapsed > args.budget
+    if failed:
+        print(f"失败：超过预算 {args.budget:.1f} s")
+        return 1
+    print(f"通过：预算 {args.budget:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""并行选课搜索的加速比测试：在随机生成的目录上比较顺序搜索和不同进程数的并行搜索
+
+用法：python benchmarks/bench_parallel_search.py [--courses 16] [--sections 6] [--top 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "codes"))
+
+from schedule_core import (  # noqa: E402
+    EarlyClassObjective,
+    IdleGapObjective,
+    ParallelScheduleSearch,
+    ScheduleOptimizer,
+    StudyDaysObjective,
+)
+from synthetic_catalog import generate_catalog  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行选课搜索的加速比测试")
+    parser.add_argument("--courses", type=int, default=16, help="心愿课程数")
+    parser.add_argument("--sections", type=int, default=6, help="每门课程的教学班数")
+    parser.add_argument("--top", type=int, default=10, help="求最好的方案数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    courses = generate_catalog(args.courses * args.sections, sections_per_course=args.sections, seed=args.seed)
+    names = sorted({course.name for course in courses})
+    objectives = [EarlyClassObjective(), StudyDaysObjective(), IdleGapObjective()]
+
+    start = time.perf_counter()
+    expected = ScheduleOptimizer(courses, names, objectives).top(args.top)
+    sequential = time.perf_counter() - start
+    print(f"顺序搜索：{sequential:.2f} s")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with ParallelScheduleSearch(courses, names, objectives=objectives, workers=workers) as search:
+            start = time.perf_counter()
+            result = search.top(args.top)
+            elapsed = time.perf_counter() - start
+        same = [score for score, _ in result] == [score for score, _ in expected]
+        print(f"{workers}个进程：{elapsed:.2f} s，加速比 {sequential / elapsed:.2f}，"
+              f"评分{'一致' if same else '不一致'}")
+        if not same:
+            return 1
+        workers *= 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
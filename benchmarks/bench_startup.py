@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""程序冷启动时间测试：从启动进程到主窗口首帧绘制完成的时间，超过预算时返回非零退出码
+
+用法：python benchmarks/bench_startup.py [--budget 秒] [--runs 次数]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "codes", "course-schedule.py")
+MARKER = "FIRST_PAINT"
+
+
+def measure_once(timeout):
+    """启动一次程序，返回启动到首帧绘制的秒数"""
+    env = dict(os.environ, COURSE_SCHEDULE_STARTUP_PROBE="1")
+    start = time.time()
+    process = subprocess.Popen(
+        [sys.executable, APP],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        cwd=os.path.dirname(APP),
+        text=True,
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        raise RuntimeError(f"程序在{timeout}秒内没有完成首帧绘制")
+
+    for line in stdout.splitlines():
+        if line.startswith(MARKER):
+            return float(line.split()[1]) - start
+    raise RuntimeError(f"没有读到首帧绘制时间，程序输出：\n{stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="课表程序冷启动时间测试")
+    parser.add_argument("--budget", type=float, default=1.5, help="首帧绘制时间预算（秒），默认1.5")
+    parser.add_argument("--runs", type=int, default=5, help="测试次数，取中位数，默认5")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单次启动超时（秒）")
+    args = parser.parse_args()
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("跳过：没有可用的图形显示（DISPLAY未设置），可用xvfb-run运行")
+        return 0
+
+    times = sorted(measure_once(args.timeout) for _ in range(args.runs))
+    median = times[len(times) // 2]
+    print(f"首帧绘制时间：中位数 {median * 1000:.0f} ms，"
+          f"最快 {times[0] * 1000:.0f} ms，最慢 {times[-1] * 1000:.0f} ms（{args.runs}次）")
+
+    if median > args.budget:
+        print(f"失败：超过预算 {args.budget * 1000:.0f} ms")
+        return 1
+    print(f"通过：预算 {args.budget * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""性能测试：在不同规模的随机目录上测量主要操作的耗时和内存，并与基线比较
+
+每种规模都测两组：
+- core.*：schedule_core中对应的核心逻辑，不需要图形界面；
+- ui.*：CourseScheduleApp的check_course_conflict、update_elective_list、update_schedule_display、
+  导入课表（load_schedule_file，即import_schedule_json选定文件之后的部分）和TimeSelectionDialog。
+  需要图形显示：没有DISPLAY时自动启动Xvfb虚拟显示，找不到Xvfb时跳过。
+
+耗时取多次运行的最小值，内存为单次运行中tracemalloc记录的峰值。与基线相比耗时或内存
+超过容差，或者核心用例在基线中没有记录时返回非零退出码。界面用例的基线需要在有图形显示
+或Xvfb的环境中用--update-baseline记录，没有基线的界面用例默认只提示并跳过，--strict时也算失败。
+
+用法：
+    python benchmarks/bench_suite.py                     # 与基线比较
+    python benchmarks/bench_suite.py --update-baseline   # 重新记录基线
+    python benchmarks/bench_suite.py --sizes 100,1000 --no-ui
+    python benchmarks/bench_suite.py --strict            # 任何用例没有基线都算失败
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CODES_DIR = os.path.join(os.path.dirname(BENCH_DIR), "codes")
+sys.path.insert(0, CODES_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from schedule_core import MergedCatalog, SelectionModel, WeekGridCache, load_schedule, save_schedule  # noqa: E402
+from synthetic_catalog import generate_catalog  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_SIZES = (100, 1000, 10000)
+WEEK_COUNT = 20
+SELECTED_COUNT = 200  # 已选课程数
+CHECK_COUNT = 200  # 每次冲突检查的候选课程数
+PERIODS = list(range(1, 11))
+# 基线很小时的绝对容差，避免计时噪声造成误报
+MIN_SECONDS_DELTA = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+
+
+def measure(run, setup=None, repeat=3):
+    """返回 (最短耗时秒数, 内存峰值MB)；setup在每次运行前调用，不计入结果"""
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024)
+
+
+def core_cases(courses, filename):
+    """不需要图形界面的核心逻辑"""
+    selected = courses[:SELECTED_COUNT]
+    candidates = courses[SELECTED_COUNT:SELECTED_COUNT + CHECK_COUNT] or courses[:CHECK_COUNT]
+    selection = SelectionModel(selected)
+    state = {}
+
+    def check_conflicts():
+        for course in candidates:
+            selection.conflicts(course)
+
+    def merge_catalog():
+        catalog = MergedCatalog()
+        catalog.sync(courses)
+        catalog.entries()
+
+    def new_grid_cache():
+        state["cache"] = WeekGridCache(PERIODS)
+
+    def build_week_grid():
+        state["cache"].get(5, selection, [1, WEEK_COUNT])
+
+    return [
+        ("core.conflicts", check_conflicts, None),
+        ("core.merged_catalog", merge_catalog, None),
+        ("core.week_grid", build_week_grid, new_grid_cache),
+        ("core.load_schedule", lambda: load_schedule(filename), None),
+    ]
+
+
+def load_app_module():
+    """载入界面程序（文件名含连字符，不能直接import）"""
+    spec = importlib.util.spec_from_file_location("course_schedule", os.path.join(CODES_DIR, "course-schedule.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ui_cases(app_module, root, courses, filename):
+    """CourseScheduleApp中的界面操作"""
+    app = app_module.CourseScheduleApp(root, autosave=False)
+    root.update()
+    app.ensure_elective_panel()
+    app.load_schedule_file(filename)
+    root.update()
+    candidates = courses[SELECTED_COUNT:SELECTED_COUNT + CHECK_COUNT] or courses[:CHECK_COUNT]
+    initial_selection = courses[0]["schedule_info"]
+    week_cycle = {"week": 1}
+
+    def check_conflicts():
+        for course in candidates:
+            app.check_course_conflict(course)
+
+    def new_course_list():
+        app.elective_courses = list(courses)
+
+    def next_week():
+        # 换一周并清空网格缓存，测量完整的计算和绘制
+        week_cycle["week"] = week_cycle["week"] % WEEK_COUNT + 1
+        app.week_var.set(str(week_cycle["week"]))
+        app.week_grids = WeekGridCache(app.periods, len(app.days))
+
+    def load_and_refresh():
+        # 导入后的界面刷新安排在空闲时执行，计入导入的耗时
+        app.load_schedule_file(filename)
+        root.update_idletasks()
+
+    def open_time_dialog():
+        dialog = app_module.TimeSelectionDialog(root, [1, WEEK_COUNT], initial_selection)
+        root.update_idletasks()
+        dialog.dialog.destroy()
+
+    return [
+        ("ui.check_course_conflict", check_conflicts, None),
+        ("ui.update_elective_list", app.update_elective_list, new_course_list),
+        ("ui.update_schedule_display", app.update_schedule_display, next_week),
+        ("ui.import_schedule_json", load_and_refresh, None),
+        ("ui.TimeSelectionDialog", open_time_dialog, None),
+    ], app
+
+
+def start_virtual_display():
+    """没有图形显示时启动Xvfb，返回其进程；不需要或无法启动时返回None"""
+    if os.environ.get("DISPLAY") or not sys.platform.startswith("linux"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        return None
+    read_fd, write_fd = os.pipe()
+    process = subprocess.Popen([xvfb, "-displayfd", str(write_fd), "-screen", "0", "1600x1000x24", "-nolisten", "tcp"],
+                               pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        display = pipe.readline().strip()
+    if not display:
+        process.terminate()
+        return None
+    os.environ["DISPLAY"] = f":{display}"
+    return process
+
+
+def compare(results, baseline, tolerance, strict=False):
+    """与基线比较，返回 (退化的用例说明列表, 跳过的没有基线的用例列表)
+
+    基线中没有的核心用例算作失败，否则新增的用例永远不会报告退化；没有基线的界面用例
+    （ui.*，只在有图形显示时运行）默认跳过，strict为True时同样算作失败。
+    """
+    regressions = []
+    skipped = []
+    for case, result in results.items():
+        base = baseline.get(case)
+        if base is None:
+            if strict or not case.startswith("ui."):
+                regressions.append(f"{case}：没有基线，使用 --update-baseline 记录")
+            else:
+                skipped.append(case)
+            continue
+        if (result["seconds"] > base["seconds"] * (1 + tolerance)
+                and result["seconds"] - base["seconds"] > MIN_SECONDS_DELTA):
+            regressions.append(f"{case}：耗时 {result['seconds'] * 1000:.1f} ms，基线 {base['seconds'] * 1000:.1f} ms")
+        if (result["peak_mb"] > base["peak_mb"] * (1 + tolerance)
+                and result["peak_mb"] - base["peak_mb"] > MIN_MEMORY_DELTA_MB):
+            regressions.append(f"{case}：内存峰值 {result['peak_mb']:.1f} MB，基线 {base['peak_mb']:.1f} MB")
+    return regressions, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="课表程序性能测试")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="选修课记录数，逗号分隔，默认100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例运行次数，取最短耗时")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基线文件")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果更新基线")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="允许超过基线的比例，默认0.5")
+    parser.add_argument("--no-ui", action="store_true", help="只测不需要图形界面的核心逻辑")
+    parser.add_argument("--strict", action="store_true", help="没有基线的界面用例也算作失败")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    display_process = None if args.no_ui else start_virtual_display()
+    run_ui = not args.no_ui and (bool(os.environ.get("DISPLAY")) or not sys.platform.startswith("linux"))
+    if not args.no_ui and not run_ui:
+        print("没有图形显示，也没有找到Xvfb，跳过界面用例")
+
+    root = app_module = None
+    if run_ui:
+        import tkinter as tk
+
+        app_module = load_app_module()
+        root = tk.Tk()
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for size in sizes:
+                courses = generate_catalog(size, WEEK_COUNT, seed=size)
+                filename = os.path.join(directory, f"catalog_{size}.json")
+                save_schedule(filename, courses, courses[:SELECTED_COUNT], [1, WEEK_COUNT])
+                # 与导入后的状态一致：课程记录来自文件
+                courses = load_schedule(filename)["elective_courses"]
+
+                cases = core_cases(courses, filename)
+                app = None
+                if run_ui:
+                    more, app = ui_cases(app_module, root, courses, filename)
+                    cases += more
+                for name, run, setup in cases:
+                    seconds, peak_mb = measure(run, setup, args.repeat)
+                    case = f"{name}[{size}]"
+                    results[case] = {"seconds": round(seconds, 6), "peak_mb": round(peak_mb, 3)}
+                    print(f"{case:<36} {seconds * 1000:10.2f} ms {peak_mb:10.2f} MB", flush=True)
+                if app is not None:
+                    for child in root.winfo_children():
+                        child.destroy()
+    finally:
+        if root is not None:
+            root.destroy()
+        if display_process is not None:
+            display_process.terminate()
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(dict(sorted(baseline.items())), file, ensure_ascii=False, indent=2)
+            file.write("\n")
+        print(f"基线已更新：{args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("没有基线文件，使用 --update-baseline 记录")
+        return 0
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    regressions, skipped = compare(results, baseline, args.tolerance, args.strict)
+    if skipped:
+        print(f"跳过 {len(skipped)} 个没有基线的界面用例，使用 --update-baseline 记录（--strict时算作失败）")
+    if regressions:
+        print("未通过：")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("与基线相比没有退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""生成接近真实情况的随机选修课目录，写为程序使用的课表JSON文件
+
+用法：python benchmarks/synthetic_catalog.py 输出文件.json --courses 1000 --weeks 20
+也可以在测试脚本中导入generate_catalog直接使用。
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "codes"))
+
+from schedule_core import Course, WeekPattern, Weekday, save_schedule  # noqa: E402
+
+# 常见的连堂安排：(开始节次, 节数)
+PERIOD_BLOCKS = ((1, 2), (3, 2), (5, 2), (7, 2), (9, 2), (3, 3), (6, 3), (9, 3))
+
+
+def generate_catalog(course_count, week_count=20, sections_per_course=3, meetings_per_week=(1, 2),
+                     week_coverage=0.8, odd_even_ratio=0.15, teacher_count=None, location_count=None,
+                     seed=0):
+    """生成course_count条选修课记录（教学班）
+
+    sections_per_course：平均每门课程（同名）的教学班数，决定同名记录的密度；
+    meetings_per_week：每个教学班每周上课次数的范围；
+    week_coverage：教学班上课周数占整个学期的平均比例；
+    odd_even_ratio：单双周上课的教学班比例。
+    同样的参数和seed总是生成同样的目录。
+    """
+    rng = random.Random(seed)
+    name_count = max(1, course_count // max(1, sections_per_course))
+    teacher_count = teacher_count or max(1, course_count // 4)
+    location_count = location_count or max(1, course_count // 10)
+
+    courses = []
+    for index in range(course_count):
+        patterns = []
+        length = max(1, min(week_count, round(rng.gauss(week_coverage, 0.1) * week_count)))
+        first_week = rng.randint(1, week_count - length + 1)
+        weeks = range(first_week, first_week + length)
+        if rng.random() < odd_even_ratio:
+            parity = rng.randint(0, 1)
+            weeks = [week for week in weeks if week % 2 == parity] or [first_week]
+        week_mask = sum(1 << week for week in weeks)
+
+        used = set()
+        for _ in range(rng.randint(*meetings_per_week)):
+            weekday = Weekday(rng.choices(range(1, 8), weights=(5, 5, 5, 5, 5, 1, 1))[0])
+            start, count = rng.choice(PERIOD_BLOCKS)
+            if (weekday, start) in used:
+                continue
+            used.add((weekday, start))
+            patterns.append(WeekPattern(weekday, range(start, start + count), week_mask))
+
+        course = Course(
+            id=index + 1,
+            name=f"课程{rng.randrange(name_count):05d}",
+            teacher=f"教师{rng.randrange(teacher_count):04d}",
+            location=f"教学楼{rng.randrange(location_count):04d}",
+            weeks=tuple(sorted(weeks)),
+            periods=tuple(sorted({period for pattern in patterns for period in pattern.periods})),
+        )
+        course.patterns = patterns
+        courses.append(course)
+    return courses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成随机选修课目录")
+    parser.add_argument("output", help="输出的课表文件（.json或.db）")
+    parser.add_argument("--courses", type=int, default=1000, help="选修课记录数")
+    parser.add_argument("--weeks", type=int, default=20, help="学期周数")
+    parser.add_argument("--sections", type=int, default=3, help="平均每门课程的教学班数")
+    parser.add_argument("--selected", type=int, default=0, help="已选课程数（取目录中的前若干条）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    courses = generate_catalog(args.courses, args.weeks, args.sections, seed=args.seed)
+    save_schedule(args.output, courses, courses[:args.selected], [1, args.weeks])
+    print(f"已生成 {len(courses)} 条选修课记录：{args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,68 +3,57 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, font, filedialog
-import pandas as pd
 import datetime
-from enum import Enum
-import json
 import os
-import datetime
+import sys
+import time
 
-class Weekday(Enum):
-    """星期枚举类型"""
-    MONDAY = 1
-    TUESDAY = 2
-    WEDNESDAY = 3
-    THURSDAY = 4
-    FRIDAY = 5
-    SATURDAY = 6
-    SUNDAY = 7
-    
-    @classmethod
-    def from_name(cls, name):
-        """从中文名称获取枚举值"""
-        name_map = {
-            "周一": cls.MONDAY,
-            "周二": cls.TUESDAY,
-            "周三": cls.WEDNESDAY,
-            "周四": cls.THURSDAY,
-            "周五": cls.FRIDAY,
-            "周六": cls.SATURDAY,
-            "周日": cls.SUNDAY
-        }
-        return name_map.get(name, cls.MONDAY)
-    
-    @classmethod
-    def from_number(cls, number):
-        """从数字获取枚举值"""
-        try:
-            num = int(number)
-            if 1 <= num <= 7:
-                return cls(num)
-            return cls.MONDAY
-        except (ValueError, TypeError):
-            return cls.MONDAY
-    
-    def to_name(self):
-        """获取中文名称"""
-        name_map = {
-            self.MONDAY: "周一",
-            self.TUESDAY: "周二",
-            self.WEDNESDAY: "周三",
-            self.THURSDAY: "周四",
-            self.FRIDAY: "周五",
-            self.SATURDAY: "周六",
-            self.SUNDAY: "周日"
-        }
-        return name_map.get(self, "周一")
-    
-    def to_column_index(self):
-        """获取在课表中的列索引（1-based）"""
-        return self.value
+from schedule_core import (
+    BackgroundTask,
+    Course,
+    CourseCatalog,
+    EditBatch,
+    MergedCatalog,
+    OBJECTIVES,
+    ParallelScheduleSearch,
+    SQLiteCatalogStore,
+    ScheduleJournal,
+    ScheduleOptimizer,
+    ScheduleSolver,
+    SelectionModel,
+    TermOverview,
+    Tracer,
+    WeekGridCache,
+    Weekday,
+    courses_on_day,
+    format_weeks,
+    load_schedule,
+    read_registrar_file,
+    save_schedule,
+    save_schedule_xlsx,
+    trace_output,
+)
 
 
 class TimeSelectionDialog:
-    """时间选择对话框，允许用户在表格中选择课程时间"""
+    """时间选择对话框，允许用户在表格中选择课程时间
+
+    表格绘制在单个Canvas上，只绘制可见的周次行，点击时按坐标换算出对应的单元格，
+    打开时间与周次范围的长度无关。
+    """
+    DAYS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+    PERIOD_LABELS = ["1/2节", "3/4节", "5/6节", "7/8节", "9/10节"]
+    PERIOD_BLOCKS = [[1, 2], [3, 4], [5, 6], [7, 8], [9, 10]]
+    
+    WEEK_COLUMN_WIDTH = 60  # 周次列宽度
+    CELL_WIDTH = 40  # 每个时间段单元格的宽度
+    SEPARATOR_WIDTH = 8  # 星期之间分隔线所占宽度
+    HEADER_HEIGHT = 24  # 星期标题行和时间段标题行的高度
+    ROW_HEIGHT = 40  # 固定行高
+    
+    SELECTED_COLOR = "#4a90d9"
+    EMPTY_COLOR = "#ffffff"
+    
     def __init__(self, parent, week_range=None, initial_selection=None):
         self.parent = parent
         self.result = []  # 存储选择的时间信息
@@ -80,6 +69,19 @@ class TimeSelectionDialog:
                 periods = info["periods"]
                 for period in periods:
                     self.selected.add((week, day, period))
+            
+            # 时间段的第一节被选中时，视为整个时间段被选中
+            block_of = {block[0]: block for block in self.PERIOD_BLOCKS}
+            for week, day, period in list(self.selected):
+                if (period in block_of and day in self.DAYS and isinstance(week, int)
+                        and self.week_range[0] <= week <= self.week_range[1]):
+                    for p in block_of[period]:
+                        self.selected.add((week, day, p))
+        
+        self.day_width = self.CELL_WIDTH * len(self.PERIOD_BLOCKS) + self.SEPARATOR_WIDTH
+        self.week_count = self.week_range[1] - self.week_range[0] + 1
+        self.drawn_rows = {}  # week -> [canvas item id, ...]，当前已绘制的周次行
+        self.cell_items = {}  # (week, day_idx, block_idx) -> 单元格矩形的item id
         
         # 创建对话框
         self.dialog = tk.Toplevel(parent)
@@ -111,146 +113,56 @@ class TimeSelectionDialog:
         container_frame = ttk.Frame(content_container)
         container_frame.grid(row=0, column=0, sticky=tk.NSEW)
         
-        # 创建主滚动容器
-        main_scroll_container = ttk.Frame(container_frame)
-        main_scroll_container.pack(fill=tk.BOTH, expand=True)
-        
         # 创建水平滚动条
-        scrollbar_x = ttk.Scrollbar(main_scroll_container, orient=tk.HORIZONTAL)
+        scrollbar_x = ttk.Scrollbar(container_frame, orient=tk.HORIZONTAL)
         scrollbar_x.pack(side=tk.BOTTOM, fill=tk.X)
         
         # 创建右侧滚动条
-        scrollbar_y = ttk.Scrollbar(main_scroll_container, orient=tk.VERTICAL)
+        scrollbar_y = ttk.Scrollbar(container_frame, orient=tk.VERTICAL)
         scrollbar_y.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # 创建画布
-        canvas = tk.Canvas(main_scroll_container)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # 创建表格框架（包含周次列和可滚动的内容）
-        self.table_frame = ttk.Frame(canvas)
-        
-        canvas.create_window((0, 0), window=self.table_frame, anchor="nw")
+        # 创建画布，整个表格都绘制在这一个画布上
+        self.canvas = tk.Canvas(container_frame, background=self.EMPTY_COLOR, highlightthickness=0,
+                                yscrollincrement=self.ROW_HEIGHT)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # 在表格框架中创建左侧周次列容器
-        self.week_column_frame = ttk.Frame(self.table_frame)
-        self.week_column_frame.grid(row=0, column=0, sticky=tk.NSEW)
+        # 滚动区域按完整表格大小设置，但只绘制可见部分
+        total_width = self.WEEK_COLUMN_WIDTH + self.day_width * len(self.DAYS)
+        total_height = self.HEADER_HEIGHT * 2 + self.ROW_HEIGHT * self.week_count
+        self.canvas.configure(scrollregion=(0, 0, total_width, total_height))
         
-        # 在表格框架中创建右侧内容容器
-        self.content_frame = ttk.Frame(self.table_frame)
-        self.content_frame.grid(row=0, column=1, sticky=tk.NSEW)
-        
-        # 配置滚动条和画布的关联
-        canvas.configure(yscrollcommand=scrollbar_y.set)
-        scrollbar_y.config(command=canvas.yview)
-        canvas.configure(xscrollcommand=scrollbar_x.set)
-        scrollbar_x.config(command=canvas.xview)
-
+        # 配置滚动条和画布的关联，滚动后补绘新露出的行
+        def on_yview(*args):
+            self.canvas.yview(*args)
+            self.draw_visible_rows()
         
-        
-        # 配置表格框架的列权重
-        self.week_column_frame.grid_columnconfigure(0, weight=0)  # 周次列固定宽度
-        self.content_frame.grid_columnconfigure(1, weight=1)  # 内容列占据剩余空间
+        self.canvas.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        scrollbar_y.config(command=on_yview)
+        scrollbar_x.config(command=self.canvas.xview)
         
         # 绑定鼠标滚轮事件以支持滚轮滚动
         def on_mousewheel(event):
-            try:
-                # 获取当前滚动位置
-                y1 = canvas.yview()[0]
-                y2 = canvas.yview()[1]
-                
-                # Windows系统使用event.delta
-                if hasattr(event, 'delta'):
-                    # Windows: 向上滚动delta为正，向下为负
-                    delta = event.delta
-                    # 向上滚动为正，向下为负，需要取反
-                    if delta > 0:
-                        # 检查是否已经到达顶部
-                        if y1 > 0:
-                            canvas.yview_scroll(-1, "units")
-                    else:
-                        # 检查是否已经到达底部
-                        if y2 < 1:
-                            canvas.yview_scroll(1, "units")
-                else:
-                    # Linux: Button-4向上，Button-5向下
-                    if event.num == 4:
-                        # 检查是否已经到达顶部
-                        if y1 > 0:
-                            canvas.yview_scroll(-1, "units")
-                    elif event.num == 5:
-                        # 检查是否已经到达底部
-                        if y2 < 1:
-                            canvas.yview_scroll(1, "units")
-            except Exception as e:
-                print(f"滚轮事件处理错误: {e}")  # 调试信息
+            # Windows系统使用event.delta，向上滚动delta为正；Linux: Button-4向上，Button-5向下
+            if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+                self.canvas.yview_scroll(-1, "units")
+            else:
+                self.canvas.yview_scroll(1, "units")
+            self.draw_visible_rows()
             return "break"
         
-        # 绑定鼠标滚轮事件到所有可能的组件
-        # 绑定到对话框本身
-        self.dialog.bind("<MouseWheel>", on_mousewheel)
-        self.dialog.bind("<Button-4>", on_mousewheel)
-        self.dialog.bind("<Button-5>", on_mousewheel)
-        
-        # 绑定到主框架
-        main_frame.bind("<MouseWheel>", on_mousewheel)
-        main_frame.bind("<Button-4>", on_mousewheel)
-        main_frame.bind("<Button-5>", on_mousewheel)
-        
-        # 绑定到容器框架
-        container_frame.bind("<MouseWheel>", on_mousewheel)
-        container_frame.bind("<Button-4>", on_mousewheel)
-        container_frame.bind("<Button-5>", on_mousewheel)
-        
-        # 绑定到canvas
-        canvas.bind("<MouseWheel>", on_mousewheel)
-        canvas.bind("<Button-4>", on_mousewheel)
-        canvas.bind("<Button-5>", on_mousewheel)
-        
-        # 确保canvas可以获得焦点
-        canvas.focus_set()
-        
-        # 添加点击canvas时设置焦点
-        def on_canvas_click(event):
-            canvas.focus_set()
-        canvas.bind("<Button-1>", on_canvas_click)
-        
-        # 绑定画布大小变化事件
-        def on_configure(event):
-            # 计算表格框架的实际大小
-            bbox = self.table_frame.bbox("all")
-            if bbox:
-                # 获取canvas的当前大小
-                canvas_width = canvas.winfo_width()
-                canvas_height = canvas.winfo_height()
-                
-                # 计算实际需要的滚动区域
-                # 确保滚动区域至少包含所有内容
-                scroll_width = max(bbox[2], canvas_width)
-                scroll_height = max(bbox[3], canvas_height)
-                
-                # 设置滚动区域，添加一些边距防止滚动到边界时出现问题
-                scrollregion = (0, 0, scroll_width + 10, scroll_height + 10)
-                canvas.configure(scrollregion=scrollregion)
-                
-                # 强制更新滚动条状态
-                canvas.update_idletasks()
+        for widget in (self.dialog, self.canvas):
+            widget.bind("<MouseWheel>", on_mousewheel)
+            widget.bind("<Button-4>", on_mousewheel)
+            widget.bind("<Button-5>", on_mousewheel)
         
-        self.table_frame.bind("<Configure>", on_configure)
+        # 点击单元格切换选择状态；画布大小变化时补绘可见行
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.canvas.bind("<Configure>", lambda event: self.draw_visible_rows())
+        self.canvas.focus_set()
         
         # 创建时间选择表格
         self.create_time_table()
         
-        # 在表格创建完成后，手动更新滚动区域
-        self.dialog.update_idletasks()
-        bbox = self.table_frame.bbox("all")
-        if bbox:
-            # 确保滚动区域包含所有内容，添加额外边距
-            scrollregion = (0, 0, bbox[2] + 20, bbox[3] + 20)
-            canvas.configure(scrollregion=scrollregion)
-            # 强制更新滚动条状态
-            canvas.update_idletasks()
-        
         # 按钮框架（使用grid布局确保始终可见）
         button_frame = ttk.Frame(content_container)
         button_frame.grid(row=1, column=0, sticky=tk.EW, pady=(10, 0))
@@ -259,117 +171,115 @@ class TimeSelectionDialog:
         ttk.Button(button_frame, text="取消", command=self.cancel).pack(side=tk.RIGHT, padx=5)
         
     def create_time_table(self):
-        """创建时间选择表格"""
-        # 星期标题
-        days = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-        periods = ["1/2节", "3/4节", "5/6节", "7/8节", "9/10节"]
-        
-        # 创建周次标题行（在固定容器中）
-        ttk.Label(self.week_column_frame, text="周次", font=("SimHei", 10, "bold"), width=8).grid(
-            row=0, column=0, padx=1, pady=1)
-        
-        # 创建星期标题（每个星期占据5列）
-        for col_idx, day in enumerate(days):
-            # 合并5列创建星期标题
-            ttk.Label(self.content_frame, text=day, font=("SimHei", 10, "bold"), width=40).grid(
-                row=0, column=col_idx * 6 + 2, columnspan=5, padx=1, pady=1, sticky=tk.NSEW)
-            
-            # 在每个星期标题下创建时间段小标题
-            for period_idx, period in enumerate(periods):
-                ttk.Label(self.content_frame, text=period, font=("SimHei", 9), width=8).grid(
-                    row=1, column=col_idx * 6 + period_idx, padx=1, pady=1, sticky=tk.NSEW)
+        """绘制表头，并绘制当前可见的周次行"""
+        canvas = self.canvas
+        header_font = ("SimHei", 10, "bold")
+        period_font = ("SimHei", 9)
+        
+        # 周次标题
+        canvas.create_text(self.WEEK_COLUMN_WIDTH / 2, self.HEADER_HEIGHT, text="周次", font=header_font)
+        
+        for day_idx, day in enumerate(self.DAYS):
+            left = self.WEEK_COLUMN_WIDTH + day_idx * self.day_width
+            # 星期标题，横跨5个时间段
+            canvas.create_text(left + self.CELL_WIDTH * len(self.PERIOD_BLOCKS) / 2, self.HEADER_HEIGHT / 2,
+                               text=day, font=header_font)
+            
+            # 时间段小标题
+            for block_idx, label in enumerate(self.PERIOD_LABELS):
+                canvas.create_text(left + (block_idx + 0.5) * self.CELL_WIDTH, self.HEADER_HEIGHT * 1.5,
+                                   text=label, font=period_font)
             
             # 在每个星期后面添加竖线分隔符（除了最后一个星期）
-            if col_idx < len(days) - 1:
-                # 添加竖线分隔符，跨越所有行（标题行+时间段行+所有周次行）
-                separator = ttk.Separator(self.content_frame, orient=tk.VERTICAL)
-                separator.grid(row=0, column=col_idx * 6 + 5, rowspan=self.week_range[1] - self.week_range[0] + 3, 
-                             sticky=tk.NS, padx=(2, 2))
-        
-        # 创建周次选择行（每行代表一周）
-        for week in range(self.week_range[0], self.week_range[1] + 1):
-            # 周次标签（在固定容器中）
-            ttk.Label(self.week_column_frame, text=f"第{week}周", font=("SimHei", 9)).grid(
-                row=week + 1, column=0, padx=1, pady=1, sticky=tk.NSEW)
-            
-            # 为每个周次创建时间段选择按钮
-            for col_idx, day in enumerate(days):
-                for period_idx, period in enumerate(periods):
-                    # 计算实际节次（用于存储）
-                    if period == "1/2节":
-                        actual_periods = [1, 2]
-                    elif period == "3/4节":
-                        actual_periods = [3, 4]
-                    elif period == "5/6节":
-                        actual_periods = [5, 6]
-                    elif period == "7/8节":
-                        actual_periods = [7, 8]
-                    else:  # "9/10节"
-                        actual_periods = [9, 10]
-                    
-                    # 创建选择按钮，检查是否在初始选择中
-                    is_selected = (week, day, actual_periods[0]) in self.selected
-                    var = tk.BooleanVar(value=is_selected)
-                    cb = ttk.Checkbutton(self.content_frame, variable=var)
-                    cb.grid(row=week + 1, column=col_idx * 6 + period_idx, padx=1, pady=1, sticky=tk.NSEW)
-                    
-                    # 如果是初始选择，确保在selected集合中添加所有相关节次
-                    if is_selected:
-                        for p in actual_periods:
-                            self.selected.add((week, day, p))
-                    
-                    # 保存按钮信息
-                    cb_info = {
-                        "var": var,
-                        "week": week,
-                        "day": day,
-                        "periods": actual_periods,
-                        "row": week + 1,
-                        "col": col_idx * 5 + period_idx + 1
-                    }
-                    
-                    # 绑定事件
-                    var.trace_add("write", lambda *args, info=cb_info: self.on_checkbox_change(info))
-                    
-                    # 存储按钮信息
-                    if not hasattr(self, "checkboxes"):
-                        self.checkboxes = []
-                    self.checkboxes.append(cb_info)
-        
-        # 确保表格大小合适，调整列宽避免挤占滚动条空间
-        for i in range(self.week_range[1] - self.week_range[0] + 2): 
-            # 为两个框架设置相同的行高配置，确保垂直对齐
-            row_height = 40  # 固定行高
-            self.content_frame.grid_rowconfigure(i, weight=0, minsize=row_height)
-            self.week_column_frame.grid_rowconfigure(i, weight=0, minsize=row_height)
-        
-        # 配置周次列容器的列宽
-        self.week_column_frame.grid_columnconfigure(0, weight=0, minsize=60)
-        
-        # 配置可滚动表格的列宽（不包含周次列）
-        # 现在是7天×(5时间段+1分隔符) = 42列
-        for i in range(42):  # 0-41列（7天×(5时间段+1分隔符)）
-            if i % 6 == 5:  # 分隔符列
-                self.content_frame.grid_columnconfigure(i, weight=0, minsize=4)  # 分隔符列很窄
-            else:  # 时间段列
-                self.content_frame.grid_columnconfigure(i, weight=1, minsize=15)
+            if day_idx < len(self.DAYS) - 1:
+                x = left + self.day_width - self.SEPARATOR_WIDTH / 2
+                canvas.create_line(x, 0, x, self.HEADER_HEIGHT * 2 + self.ROW_HEIGHT * self.week_count,
+                                   fill="#a0a0a0", width=2)
+        
+        self.draw_visible_rows()
+    
+    def visible_weeks(self):
+        """根据当前滚动位置计算可见的周次范围"""
+        top = self.canvas.canvasy(0) - self.HEADER_HEIGHT * 2
+        height = max(self.canvas.winfo_height(), 600)  # 窗口尚未布局时按对话框高度估算
+        first_row = max(int(top // self.ROW_HEIGHT), 0)
+        last_row = min(int((top + height) // self.ROW_HEIGHT), self.week_count - 1)
+        return range(self.week_range[0] + first_row, self.week_range[0] + last_row + 1)
+    
+    def draw_visible_rows(self):
+        """只绘制可见的周次行，删除已滚出视野的行"""
+        visible = self.visible_weeks()
+        for week in [week for week in self.drawn_rows if week not in visible]:
+            self.canvas.delete(*self.drawn_rows.pop(week))
+            for day_idx in range(len(self.DAYS)):
+                for block_idx in range(len(self.PERIOD_BLOCKS)):
+                    self.cell_items.pop((week, day_idx, block_idx), None)
+        
+        for week in visible:
+            if week not in self.drawn_rows:
+                self.drawn_rows[week] = self.draw_week_row(week)
     
-    def on_checkbox_change(self, info):
-        """当复选框状态改变时的处理"""
-        week = info["week"]
-        day = info["day"]
-        periods = info["periods"]
+    def draw_week_row(self, week):
+        """绘制一周的周次标签和全部单元格，返回创建的item id列表"""
+        canvas = self.canvas
+        top = self.HEADER_HEIGHT * 2 + (week - self.week_range[0]) * self.ROW_HEIGHT
+        items = [canvas.create_text(self.WEEK_COLUMN_WIDTH / 2, top + self.ROW_HEIGHT / 2,
+                                    text=f"第{week}周", font=("SimHei", 9))]
+        
+        for day_idx, day in enumerate(self.DAYS):
+            left = self.WEEK_COLUMN_WIDTH + day_idx * self.day_width
+            for block_idx, periods in enumerate(self.PERIOD_BLOCKS):
+                x = left + block_idx * self.CELL_WIDTH
+                is_selected = (week, day, periods[0]) in self.selected
+                item = canvas.create_rectangle(
+                    x + 4, top + 8, x + self.CELL_WIDTH - 4, top + self.ROW_HEIGHT - 8,
+                    fill=self.SELECTED_COLOR if is_selected else self.EMPTY_COLOR, outline="#808080")
+                self.cell_items[(week, day_idx, block_idx)] = item
+                items.append(item)
+        return items
+    
+    def cell_at(self, x, y):
+        """将画布坐标换算为 (week, day_idx, block_idx)，不在单元格上时返回None"""
+        row = int((y - self.HEADER_HEIGHT * 2) // self.ROW_HEIGHT)
+        if y < self.HEADER_HEIGHT * 2 or row >= self.week_count:
+            return None
+        
+        offset = x - self.WEEK_COLUMN_WIDTH
+        day_idx = int(offset // self.day_width)
+        if offset < 0 or day_idx >= len(self.DAYS):
+            return None
+        
+        block_idx = int((offset - day_idx * self.day_width) // self.CELL_WIDTH)
+        if block_idx >= len(self.PERIOD_BLOCKS):
+            return None  # 点在分隔线上
+        return self.week_range[0] + row, day_idx, block_idx
+    
+    def on_canvas_click(self, event):
+        """点击单元格时切换该时间段的选择状态"""
+        self.canvas.focus_set()
+        cell = self.cell_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if cell is not None:
+            self.toggle_cell(*cell)
+    
+    def toggle_cell(self, week, day_idx, block_idx):
+        """切换单元格的选择状态并更新其颜色"""
+        day = self.DAYS[day_idx]
+        periods = self.PERIOD_BLOCKS[block_idx]
         
-        if info["var"].get():
-            # 选中状态
+        if (week, day, periods[0]) in self.selected:
+            # 未选中状态
             for p in periods:
-                self.selected.add((week, day, p))
+                self.selected.discard((week, day, p))
+            fill = self.EMPTY_COLOR
         else:
-            # 未选中状态
+            # 选中状态
             for p in periods:
-                if (week, day, p) in self.selected:
-                    self.selected.remove((week, day, p))
-
+                self.selected.add((week, day, p))
+            fill = self.SELECTED_COLOR
+        
+        item = self.cell_items.get((week, day_idx, block_idx))
+        if item is not None:
+            self.canvas.itemconfigure(item, fill=fill)
     
     def confirm(self):
         """确认选择"""
@@ -402,10 +312,170 @@ class TimeSelectionDialog:
             self.result = []
         self.dialog.destroy()
 
+
+class TermOverviewDialog:
+    """总体课表：整个周次范围内每个(星期, 节次)有课的周数，以颜色深浅表示
+
+    全部单元格绘制在单个Canvas上，鼠标移到或点击单元格时在下方显示该时间的周次和课程。
+    已选课程或周次范围变化时由主窗口调用refresh重新绘制。
+    """
+    PERIOD_COLUMN_WIDTH = 50  # 节次列宽度
+    CELL_WIDTH = 100
+    CELL_HEIGHT = 44
+    HEADER_HEIGHT = 28
+
+    EMPTY_COLOR = (255, 255, 255)
+    FULL_COLOR = (74, 144, 217)  # 每周都有课时的颜色
+    CONFLICT_OUTLINE = "#d9534f"
+
+    def __init__(self, app):
+        self.app = app
+        self.overview = None
+        self.dialog = tk.Toplevel(app.root)
+        self.dialog.title("总体课表")
+        self.dialog.transient(app.root)
+
+        width = self.PERIOD_COLUMN_WIDTH + self.CELL_WIDTH * len(app.days)
+        height = self.HEADER_HEIGHT + self.CELL_HEIGHT * len(app.periods)
+        self.canvas = tk.Canvas(self.dialog, width=width, height=height, bg="white", highlightthickness=0)
+        self.canvas.pack(padx=10, pady=(10, 5))
+
+        self.info_var = tk.StringVar(value="将鼠标移到单元格上查看上课周次")
+        ttk.Label(self.dialog, textvariable=self.info_var, wraplength=width, justify=tk.LEFT).pack(
+            fill=tk.X, padx=10, pady=(0, 10))
+
+        self.canvas.bind("<Motion>", self.on_canvas_motion)
+        self.canvas.bind("<Button-1>", self.on_canvas_motion)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def refresh(self):
+        """重新计算总体课表并重绘全部单元格"""
+        app = self.app
+        self.overview = app.term_overview()
+        canvas = self.canvas
+        canvas.delete("all")
+        header_font = ("SimHei", 10, "bold")
+        cell_font = ("SimHei", 9)
+
+        for day_idx, day in enumerate(app.days):
+            x = self.PERIOD_COLUMN_WIDTH + (day_idx + 0.5) * self.CELL_WIDTH
+            canvas.create_text(x, self.HEADER_HEIGHT / 2, text=day, font=header_font)
+
+        week_count = max(self.overview.week_count, 1)
+        for row, period in enumerate(app.periods):
+            top = self.HEADER_HEIGHT + row * self.CELL_HEIGHT
+            canvas.create_text(self.PERIOD_COLUMN_WIDTH / 2, top + self.CELL_HEIGHT / 2, text=str(period),
+                               font=header_font)
+            for day_idx in range(len(app.days)):
+                count = int(self.overview.counts[day_idx, period - 1])
+                conflicts = int(self.overview.conflict_counts[day_idx, period - 1])
+                left = self.PERIOD_COLUMN_WIDTH + day_idx * self.CELL_WIDTH
+                canvas.create_rectangle(left + 2, top + 2, left + self.CELL_WIDTH - 2, top + self.CELL_HEIGHT - 2,
+                                        fill=self.cell_color(count / week_count),
+                                        outline=self.CONFLICT_OUTLINE if conflicts else "#c0c0c0",
+                                        width=2 if conflicts else 1)
+                if count:
+                    text = f"{count}周" + (f"（冲突{conflicts}周）" if conflicts else "")
+                    canvas.create_text(left + self.CELL_WIDTH / 2, top + self.CELL_HEIGHT / 2, text=text,
+                                       font=cell_font, fill="white" if count * 2 > week_count else "black")
+
+    def cell_color(self, ratio):
+        """按有课周数的比例在空白色和满色之间插值"""
+        return "#%02x%02x%02x" % tuple(round(empty + (full - empty) * ratio)
+                                       for empty, full in zip(self.EMPTY_COLOR, self.FULL_COLOR))
+
+    def cell_at(self, x, y):
+        """将画布坐标换算为 (day_idx, period)，不在单元格上时返回None"""
+        column = int((x - self.PERIOD_COLUMN_WIDTH) // self.CELL_WIDTH)
+        row = int((y - self.HEADER_HEIGHT) // self.CELL_HEIGHT)
+        if x < self.PERIOD_COLUMN_WIDTH or y < self.HEADER_HEIGHT:
+            return None
+        if column >= len(self.app.days) or row >= len(self.app.periods):
+            return None
+        return column, self.app.periods[row]
+
+    def on_canvas_motion(self, event):
+        """显示鼠标所在单元格的上课周次、冲突周次和课程"""
+        cell = self.cell_at(event.x, event.y)
+        if cell is None or self.overview is None:
+            return
+        day_idx, period = cell
+        weeks = self.overview.weeks(day_idx, period)
+        title = f"{self.app.days[day_idx]} 第{period}节"
+        if not weeks:
+            self.info_var.set(f"{title}：没有课程")
+            return
+        text = f"{title}：第{format_weeks(sum(1 << week for week in weeks))}周有课（共{len(weeks)}周）"
+        conflict_weeks = self.overview.conflict_weeks(day_idx, period)
+        if conflict_weeks:
+            text += f"，第{format_weeks(sum(1 << week for week in conflict_weeks))}周冲突"
+        text += "\n课程：" + "、".join(self.overview.course_names(day_idx, period))
+        self.info_var.set(text)
+
+    def close(self):
+        self.app.term_overview_dialog = None
+        self.dialog.destroy()
+
+
+class TraceOverlay:
+    """性能追踪窗口：显示最近最慢的操作，可随时保存追踪文件"""
+
+    REFRESH_MS = 1000  # 刷新间隔
+    ROW_COUNT = 10  # 显示的操作数
+
+    def __init__(self, parent, tracer, filename):
+        self.tracer = tracer
+        self.filename = filename
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("性能追踪")
+        self.dialog.geometry("520x300")
+        self.dialog.attributes("-topmost", True)
+        self.dialog.transient(parent)
+
+        columns = ("max", "mean", "count")
+        self.tree = ttk.Treeview(self.dialog, columns=columns, height=self.ROW_COUNT)
+        self.tree.heading("#0", text="操作")
+        self.tree.heading("max", text="最长(ms)")
+        self.tree.heading("mean", text="平均(ms)")
+        self.tree.heading("count", text="次数")
+        self.tree.column("#0", width=280)
+        for column in columns:
+            self.tree.column(column, width=70, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.status_var = tk.StringVar(value=f"追踪文件：{filename}")
+        ttk.Label(button_frame, textvariable=self.status_var).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="保存追踪文件", command=self.save).pack(side=tk.RIGHT)
+
+        # 关闭窗口只是隐藏，程序退出时仍然写出追踪文件
+        self.dialog.protocol("WM_DELETE_WINDOW", self.dialog.withdraw)
+        self.refresh()
+
+    def refresh(self):
+        """刷新最慢操作列表"""
+        self.tree.delete(*self.tree.get_children())
+        for name, longest, mean, calls in self.tracer.slowest(self.ROW_COUNT):
+            self.tree.insert("", tk.END, text=name, values=(f"{longest:.1f}", f"{mean:.1f}", calls))
+        self.dialog.after(self.REFRESH_MS, self.refresh)
+
+    def save(self):
+        """写出追踪文件"""
+        try:
+            self.tracer.export(self.filename)
+            self.status_var.set(f"已保存：{self.filename}")
+        except OSError as e:
+            messagebox.showerror("错误", f"保存追踪文件失败：{str(e)}", parent=self.dialog)
+
 class CourseScheduleApp:
     """课程表管理应用"""
     
-    def __init__(self, root):
+    BACKGROUND_POLL_MS = 50  # 后台任务的进度轮询间隔
+    AUTOSAVE_DIR = os.path.join(os.path.dirname(__file__), "..", "datas", "autosave")  # 编辑日志和快照
+    
+    def __init__(self, root, autosave=True):
         self.root = root
         self.root.title("课程表管理系统")
         self.root.geometry("1400x800")
@@ -422,10 +492,17 @@ class CourseScheduleApp:
         self.root.option_add("*Font", self.chinese_font)
         
         # 初始化数据
-        self.elective_courses = []
-        self.selected_electives = []  # 修改：使用列表存储已选课程，而不是集合
+        self.catalog = CourseCatalog()  # 选修课列表，按id和名称索引
+        self.merged_catalog = MergedCatalog()  # 按名称合并后的选修课目录
+        self.selection = SelectionModel()  # 已选课程及其实时占用表
         self.use_english_fallback = False
         self.week_range = [1, 20]  # 默认周次范围1-20周
+        self.autosave = autosave
+        self.journal = None  # 编辑日志，首帧绘制后恢复上次的状态时打开
+        self._pending_refresh = {"weeks": False, "elective": False, "schedule": False}  # 等待空闲时刷新的部分
+        self._refresh_job = None
+        self._term_overview = None  # ((已选课程版本, 周次范围), TermOverview)
+        self.term_overview_dialog = None  # 打开着的总体课表窗口
         
         # 创建主框架
         self.main_frame = ttk.Frame(self.root, padding="10")
@@ -456,17 +533,141 @@ class CourseScheduleApp:
         # 添加按钮
         ttk.Button(self.button_frame, text="新建课表", command=self.create_new_schedule).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(self.button_frame, text="今日课程", command=self.show_today_courses).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(self.button_frame, text="总体课表", command=self.show_term_overview).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(self.button_frame, text="添加课程", command=self.show_add_course_dialog).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(self.button_frame, text="保存课表", command=self.export_schedule_json).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(self.button_frame, text="导出Excel", command=self.export_schedule_xlsx).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(self.button_frame, text="加载课表", command=self.import_schedule_json).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(self.button_frame, text="批量导入", command=self.import_registrar_file).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(self.button_frame, text="设置周次范围", command=self.set_week_range).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(self.button_frame, text="自动排课", command=self.show_solver_dialog).pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 显示上次刷新课表发出的Tk调用次数
+        self.refresh_stats_var = tk.StringVar()
+        ttk.Label(self.button_frame, textvariable=self.refresh_stats_var).pack(side=tk.RIGHT)
         
-        #
-        self.create_elective_list()
+        # 右侧选修课面板（周次选择、课程列表、课程详情）在主窗口首帧绘制后再创建
+        self._elective_panel_built = False
+        self.first_paint_time = None
+        self.first_paint_callbacks = []  # 首帧绘制完成后调用，供启动时间测试使用
+        self._first_map_binding = self.schedule_tree.bind("<Map>", self.on_first_map, add="+")
 
         # 绑定窗口关闭事件
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    def on_first_map(self, event):
+        """课表首次显示：完成首帧绘制，然后在空闲时创建右侧选修课面板"""
+        self.schedule_tree.unbind("<Map>", self._first_map_binding)
+        self.root.update_idletasks()
+        self.first_paint_time = time.perf_counter()
+        for callback in self.first_paint_callbacks:
+            callback()
+        self.root.after_idle(self.ensure_elective_panel)
+        self.root.after_idle(self.restore_autosave)
+
+    def ensure_elective_panel(self):
+        """创建右侧选修课面板（只在第一次调用时创建）"""
+        if not self._elective_panel_built:
+            self._elective_panel_built = True
+            self.create_elective_list()
+
+    def restore_autosave(self):
+        """打开编辑日志，重放快照之后的修改，恢复上次退出（或崩溃）时的状态"""
+        if not self.autosave or self.journal is not None:
+            return
+        journal = ScheduleJournal(self.AUTOSAVE_DIR)
+        try:
+            state = journal.recover()
+        except (OSError, ValueError) as e:
+            messagebox.showwarning("自动保存", f"无法恢复自动保存的数据，自动保存已停用：{str(e)}")
+            return
+        self.journal = journal
+        if state is not None:
+            self.apply_schedule_data(state)
+        if journal.skipped_records:
+            messagebox.showwarning("自动保存", f"恢复时跳过了 {journal.skipped_records} 条不完整的修改记录")
+    
+    def record_edit(self, op, **fields):
+        """把一次修改追加到编辑日志，日志较长时在后台压缩为快照"""
+        if self.journal is None:
+            return
+        try:
+            self.journal.append(op, **fields)
+        except OSError as e:
+            self.journal = None
+            messagebox.showwarning("自动保存", f"写入编辑日志失败，自动保存已停用：{str(e)}")
+            return
+        if self.journal.needs_compaction:
+            self.compact_journal()
+    
+    def compact_journal(self, background=True):
+        """把当前状态写为快照（默认在后台），删除之前的日志"""
+        if self.journal is not None:
+            self.journal.compact(self.elective_courses, self.selected_electives, self.week_range,
+                                 background=background)
+            if not background and self.journal.compaction_error is not None:
+                messagebox.showwarning("自动保存", f"写入快照失败：{str(self.journal.compaction_error)}")
+    
+    def edit_batch(self):
+        """批量修改课程和选课：with块中的修改在退出时一起提交
+
+        提交时只做一次冲突检查（结果在batch.conflicts中），写一条编辑日志，
+        并在界面空闲时合并为一次刷新。
+        """
+        return EditBatch(self.catalog, self.merged_catalog, self.selection, on_commit=self.on_batch_commit)
+    
+    def on_batch_commit(self, batch):
+        """批量修改提交后：更新周次范围、写编辑日志、安排刷新"""
+        if batch.week_range is not None:
+            self.week_range = batch.week_range
+        if len(batch.records) == 1:
+            self.record_edit(**batch.records[0])
+        elif batch.records:
+            self.record_edit("batch", records=batch.records)
+        self.request_refresh(weeks=batch.week_range is not None, elective=batch.catalog_changed,
+                             schedule=batch.selection_changed or batch.week_range is not None)
+    
+    def request_refresh(self, weeks=False, elective=False, schedule=False):
+        """登记需要刷新的界面部分（周次下拉框、选修课列表、课表），在界面空闲时合并为一次刷新"""
+        pending = self._pending_refresh
+        pending["weeks"] |= weeks
+        pending["elective"] |= elective
+        pending["schedule"] |= schedule
+        if self._refresh_job is None and any(pending.values()):
+            self._refresh_job = self.root.after_idle(self.flush_refresh)
+    
+    def flush_refresh(self):
+        """执行等待中的刷新，每部分最多一次"""
+        self._refresh_job = None
+        pending = self._pending_refresh
+        self._pending_refresh = {"weeks": False, "elective": False, "schedule": False}
+        if pending["weeks"]:
+            self.update_week_combo()
+        if pending["elective"]:
+            self.update_elective_list()
+        if pending["schedule"]:
+            self.update_schedule_display()
+            if self.term_overview_dialog is not None:
+                self.term_overview_dialog.refresh()
+    
+    @property
+    def elective_courses(self):
+        """选修课列表（按加入顺序的快照，修改请通过self.catalog）"""
+        return self.catalog.as_list()
+
+    @elective_courses.setter
+    def elective_courses(self, courses):
+        # 整体替换时建立新的目录对象，merged_catalog据此重建名称索引
+        self.catalog = CourseCatalog(courses)
+
+    @property
+    def selected_electives(self):
+        """已选课程列表（按选课顺序的快照，修改请通过self.selection）"""
+        return self.selection.as_list()
+
+    @selected_electives.setter
+    def selected_electives(self, courses):
+        self.selection.reset(courses)
     
     def create_new_schedule(self):
         """新建课表，询问周次起止时间"""
@@ -500,12 +701,10 @@ class CourseScheduleApp:
                 if start_week < 1 or end_week < start_week:
                     messagebox.showerror("错误", "请输入有效的周次范围")
                     return
-                self.week_range = [start_week, end_week]
-                self.weeks_list = list(range(start_week, end_week + 1))
-                self.selected_electives.clear()
-                self.update_schedule_display()
-                # 更新右侧周次选择下拉框的选项
-                self.update_week_combo()
+                # 新的周次范围并清空已选课程，提交后刷新周次下拉框和课表
+                with self.edit_batch() as batch:
+                    batch.set_week_range([start_week, end_week])
+                    batch.clear_selection()
                 dialog.destroy()
             except ValueError:
                 messagebox.showerror("错误", "请输入有效的数字")
@@ -548,10 +747,9 @@ class CourseScheduleApp:
                 if start_week < 1 or end_week < start_week:
                     messagebox.showerror("错误", "请输入有效的周次范围")
                     return
-                self.week_range = [start_week, end_week]
-                self.update_schedule_display()
-                # 更新右侧周次选择下拉框的选项
-                self.update_week_combo()
+                # 提交后刷新周次下拉框和课表
+                with self.edit_batch() as batch:
+                    batch.set_week_range([start_week, end_week])
                 dialog.destroy()
             except ValueError:
                 messagebox.showerror("错误", "请输入有效的数字")
@@ -564,8 +762,7 @@ class CourseScheduleApp:
     
     def clear_schedule_display(self):
         """清空课表显示"""
-        for item in self.schedule_tree.get_children():
-            self.schedule_tree.delete(item)
+        self.render_schedule_grid(tuple(("",) * len(self.days) for _ in self.periods))
     
     def create_schedule_table(self):
         """创建课表表格"""
@@ -581,6 +778,8 @@ class CourseScheduleApp:
                         Weekday.FRIDAY.to_name(), Weekday.SATURDAY.to_name(), 
                         Weekday.SUNDAY.to_name()]
         self.periods = [1, 2, 3, 4, 5, 6, 7, 8]  # 假设每天8节课
+        self.week_grids = WeekGridCache(self.periods, len(self.days))  # 每周课表网格缓存
+        self._prefetch_job = None
         
         # 创建Treeview作为课表
         columns = ["period"] + self.days
@@ -595,9 +794,13 @@ class CourseScheduleApp:
             self.schedule_tree.heading(day, text=day)
             self.schedule_tree.column(day, width=100, anchor=tk.CENTER)
         
-        # 插入行（节次）
+        # 插入行（节次），并记录节次到行id的映射，写入单元格时直接定位
+        self.period_rows = {}
         for period in self.periods:
-            self.schedule_tree.insert("", tk.END, values=[period] + [""]*len(self.days))
+            self.period_rows[period] = self.schedule_tree.insert("", tk.END, values=[period] + [""]*len(self.days))
+        # 当前屏幕上显示的网格，刷新时与目标网格比对
+        self.displayed_grid = tuple(("",) * len(self.days) for _ in self.periods)
+        self.last_refresh_tk_calls = 0
         
         # 添加滚动条
         scrollbar_y = ttk.Scrollbar(self.schedule_frame, orient=tk.VERTICAL, command=self.schedule_tree.yview)
@@ -642,7 +845,7 @@ class CourseScheduleApp:
             self.week_combo.set(self.weeks_list[0])
         
         # 绑定选择事件
-        self.week_combo.bind('<<ComboboxSelected>>', lambda e: self.filter_courses_by_week())
+        self.week_combo.bind('<<ComboboxSelected>>', lambda e: self.update_schedule_display())
         
         # 添加刷新按钮
         refresh_btn = ttk.Button(week_frame, text="刷新课程列表", command=self.filter_courses_by_week)
@@ -671,6 +874,8 @@ class CourseScheduleApp:
         
         # 创建复选框字典，用于跟踪课程选择状态
         self.course_checkboxes = {}
+        self._listbox_items = []  # 列表框当前显示的文本
+        self._listbox_version = None  # 列表框对应的目录版本
         
         # 添加课程到列表
         self.update_elective_list()
@@ -711,95 +916,36 @@ class CourseScheduleApp:
     
     def update_elective_list(self):
         """更新选修课列表显示，确保相同名称的课程只显示一次，并合并所有节次信息"""
-        # 清空列表
-        self.elective_listbox.delete(0, tk.END)
-        self.course_checkboxes.clear()
+        # 面板尚未创建时先创建（创建过程中会再次调用本方法）
+        if not self._elective_panel_built:
+            self.ensure_elective_panel()
+            return
         
-        # 创建一个字典用于合并相同名称的课程
-        merged_courses = {}
+        # 合并结果按课程名称缓存，只有发生变化的课程会重新合并
+        self.merged_catalog.sync(self.catalog)
+        if self._listbox_version == self.merged_catalog.version:
+            return
+        entries = self.merged_catalog.entries()
+        self._listbox_version = self.merged_catalog.version
         
-        # 遍历所有课程
-        for course in self.elective_courses:
-            course_name = course['name']
-            
-            # 如果是新课程，直接添加
-            if course_name not in merged_courses:
-                # 创建一个新的合并课程记录
-                merged_courses[course_name] = {
-                    "id": course["id"],
-                    "name": course_name,
-                    "schedule_info": [],  # 存储所有时间安排信息
-                    "periods": set(),     # 存储所有节次
-                    "weeks": set(),       # 存储所有周次
-                    "teachers": set(),    # 存储所有教师
-                    "locations": set()    # 存储所有地点
-                }
-            
-            # 合并课程信息
-            merged_course = merged_courses[course_name]
-            
-            # 合并时间安排信息
-            if "schedule_info" in course:
-                merged_course["schedule_info"].extend(course["schedule_info"])
-            
-            # 合并节次信息
-            if "periods" in course:
-                for period in course["periods"]:
-                    merged_course["periods"].add(period)
-            
-            # 合并周次信息（统一使用数字类型）
-            if "weeks" in course:
-                if isinstance(course["weeks"], list):
-                    for week in course["weeks"]:
-                        merged_course["weeks"].add(int(week))
-                elif isinstance(course["weeks"], str):
-                    merged_course["weeks"].add(int(course["weeks"]))
-            
-            # 合并教师信息
-            if "teacher" in course and course["teacher"] and course["teacher"] != "未知教师":
-                merged_course["teachers"].add(course["teacher"])
-            
-            # 合并地点信息
-            if "location" in course and course["location"] and course["location"] != "未知地点":
-                merged_course["locations"].add(course["location"])
-        
-        # 格式化合并后的课程信息并添加到列表
-        for course_name, merged_course in merged_courses.items():
-            # 对节次进行排序
-            all_periods = sorted(merged_course["periods"])
-            
-            # 格式化教师和地点信息
-            teachers = ", ".join(sorted(merged_course["teachers"])) if merged_course["teachers"] else "未知教师"
-            locations = ", ".join(sorted(merged_course["locations"])) if merged_course["locations"] else "未知地点"
-            weeks = ", ".join(str(w) for w in sorted(merged_course["weeks"])) if merged_course["weeks"] else "未知周次"
-            
-            # 创建完整的课程记录
-            full_course = {
-                "id": merged_course["id"],
-                "name": course_name,
-                "schedule_info": merged_course["schedule_info"],
-                "periods": all_periods,
-                "weeks": sorted([int(w) for w in merged_course["weeks"]]),  # 统一使用数字类型
-                "teacher": teachers,
-                "location": locations
-            }
-            
-            # 创建课程显示文本
-            display_text = f"{course_name} - {teachers}"
-            
-            # 添加到列表框
-            self.elective_listbox.insert(tk.END, display_text)
-            
-            # 存储课程信息
+        # 存储课程信息
+        self.course_checkboxes.clear()
+        for display_text, full_course in entries:
             self.course_checkboxes[display_text] = {
                 "course": full_course,
                 "selected": False
             }
-    
-
+        
+        # 列表内容确实变化时才重新填充列表框
+        display_texts = [display_text for display_text, _ in entries]
+        if display_texts != self._listbox_items:
+            self.elective_listbox.delete(0, tk.END)
+            if display_texts:
+                self.elective_listbox.insert(tk.END, *display_texts)
+            self._listbox_items = display_texts
         
     def update_week_combo(self):
-        """更新右侧周次选择下拉框的选项"""
+        """更新右侧周次选择下拉框的选项（课程列表和课表由调用方通过request_refresh刷新）"""
         if hasattr(self, 'week_combo') and hasattr(self, 'week_var'):
             # 更新周次列表（界面显示用字符串）
             self.weeks_list = [str(i) for i in range(self.week_range[0], self.week_range[1] + 1)]
@@ -817,9 +963,6 @@ class CourseScheduleApp:
             else:
                 # 保持当前选中的周次
                 self.week_combo.set(current_week)
-            
-            # 刷新课程列表以反映新的周次范围
-            self.filter_courses_by_week()
     
     def prev_week(self):
         """切换到上一周"""
@@ -833,7 +976,7 @@ class CourseScheduleApp:
                 # 不是第一周，可以切换到上一周
                 prev_index = current_index - 1
                 self.week_combo.set(self.weeks_list[prev_index])
-                self.filter_courses_by_week()
+                self.update_schedule_display()
                 
     def next_week(self):
         """切换到下一周"""
@@ -847,7 +990,7 @@ class CourseScheduleApp:
                 # 不是最后一周，可以切换到下一周
                 next_index = current_index + 1
                 self.week_combo.set(self.weeks_list[next_index])
-                self.filter_courses_by_week()
+                self.update_schedule_display()
     
     def on_elective_select(self, event):
         """选修课选择事件"""
@@ -946,12 +1089,14 @@ class CourseScheduleApp:
                 course = course_info["course"]
                 
                 # 检查是否已经选择了该课程
-                if course["name"] in [c["name"] for c in self.selected_electives]:
+                if self.selection.has_name(course["name"]):
                     messagebox.showwarning("提示", f"您已经选择了课程：{course['name']}")
                     return
                 
-                # 检查时间冲突
-                conflicts = self.check_course_conflict(course)
+                # 添加到已选课程列表（即使有冲突），提交时检查时间冲突，课表在空闲时刷新
+                with self.edit_batch() as batch:
+                    batch.select(course)
+                conflicts = batch.conflicts.get(course["id"], [])
                 
                 if conflicts:
                     # 格式化时间段显示
@@ -982,14 +1127,6 @@ class CourseScheduleApp:
                     conflict_msg += "您仍然可以选择此课程，但请注意时间安排！"
                     messagebox.showerror("时间冲突警告", conflict_msg)
                 
-                # 添加到已选课程列表（即使有冲突）
-                self.selected_electives.append(course)
-                
-                # 更新课表显示
-                self.update_schedule_display()
-                # 强制刷新界面
-                self.root.update_idletasks()
-                
                 if conflicts:
                     # 构建成功添加但有冲突的消息
                     conflict_courses = set(conflict['conflict_course'] for conflict in conflicts)
@@ -1015,13 +1152,9 @@ class CourseScheduleApp:
                 course_info = self.course_checkboxes[display_text]
                 course = course_info["course"]
                 
-                # 从已选课程列表中移除
-                self.selected_electives = [c for c in self.selected_electives if c["name"] != course["name"]]
-                
-                # 更新课表显示
-                self.update_schedule_display()
-                # 强制刷新界面
-                self.root.update_idletasks()
+                # 从已选课程列表中移除，课表在空闲时刷新
+                with self.edit_batch() as batch:
+                    batch.deselect_name(course["name"])
                 
                 messagebox.showinfo("成功", f"已移除课程：{course['name']}")
     
@@ -1038,27 +1171,17 @@ class CourseScheduleApp:
                 
                 # 确认删除
                 if messagebox.askyesno("确认删除", f"确定要完全删除课程《{course['name']}》吗？\n此操作将从系统中彻底删除该课程的所有信息！"):
-                    # 从已选课程列表中移除
-                    self.selected_electives = [c for c in self.selected_electives if c["name"] != course["name"]]
-                    
-                    # 从选修课列表中完全删除所有同名课程
-                    self.elective_courses = [c for c in self.elective_courses if c["name"] != course["name"]]
-                    
-                    # 更新选修课列表显示
-                    self.update_elective_list()
-                    
-                    # 更新课表显示
-                    self.update_schedule_display()
-                    # 强制刷新界面
-                    self.root.update_idletasks()
+                    # 从选修课列表和已选课程中完全删除所有同名课程，列表和课表在空闲时刷新
+                    with self.edit_batch() as batch:
+                        batch.remove_name(course["name"])
                     
                     messagebox.showinfo("成功", f"已完全删除课程：{course['name']}")
     
     def clear_elective_selections(self):
         """清空所有选修课选择"""
         if messagebox.askyesno("确认", "确定要清空所有已选课程吗？"):
-            self.selected_electives.clear()
-            self.update_schedule_display()
+            with self.edit_batch() as batch:
+                batch.clear_selection()
             messagebox.showinfo("成功", "已清空所有已选课程")
     
     def edit_course(self):
@@ -1202,7 +1325,7 @@ class CourseScheduleApp:
                 periods = {p for info in schedule_info for p in info['periods']}
                 
                 # 创建更新后的课程记录
-                updated_course = {
+                updated_course = Course.from_dict({
                     "id": course["id"],
                     "name": course['name'],
                     "teacher": new_teacher,
@@ -1210,37 +1333,15 @@ class CourseScheduleApp:
                     "schedule_info": schedule_info,
                     "weeks": sorted(weeks),
                     "periods": sorted(periods)
-                }
-                
-                # 检查冲突（排除自身）
-                # 临时从已选课程中移除当前编辑的课程
-                temp_electives = [c for c in self.selected_electives if c["id"] != course["id"]]
-                original_electives = self.selected_electives
-                self.selected_electives = temp_electives
-                
-                # 检查冲突
-                conflicts = self.check_course_conflict(updated_course)
-                
-                # 恢复原始已选课程列表
-                self.selected_electives = original_electives
+                })
                 
                 # 更新课程信息
                 course.update(updated_course)
                 
-                # 同时更新选修课列表中的课程信息
-                for i, elective_course in enumerate(self.elective_courses):
-                    if elective_course["id"] == course["id"]:
-                        self.elective_courses[i] = updated_course
-                        break
-                
-                for i, elective_course in enumerate(self.selected_electives):
-                    if elective_course["id"] == course["id"]:
-                        self.selected_electives[i] = updated_course
-                        break
-                    
-                # 更新显示
-                self.update_elective_list()
-                self.update_schedule_display()
+                # 按id替换选修课列表和已选课程中的记录，提交时检查冲突（排除自身），显示在空闲时刷新
+                with self.edit_batch() as batch:
+                    batch.edit(course["id"], updated_course)
+                conflicts = batch.conflicts.get(course["id"])
                 
                 # 显示结果
                 if conflicts:
@@ -1255,40 +1356,7 @@ class CourseScheduleApp:
     
     def check_course_conflict(self, new_course):
         """检查课程时间冲突，返回所有冲突信息列表"""
-        if "schedule_info" not in new_course:
-            return []  # 返回空列表表示没有冲突
-        
-        conflicts = []
-        
-        for schedule in new_course["schedule_info"]:
-            day = schedule["day"]
-            periods = schedule["periods"]
-            week = schedule["week"]
-            
-            # 检查与已选课程的冲突
-            for selected_course in self.selected_electives:
-                if "schedule_info" in selected_course:
-                    for selected_schedule in selected_course["schedule_info"]:
-                        if (selected_schedule["day"] == day and 
-                            selected_schedule["week"] == week and
-                            any(p in selected_schedule["periods"] for p in periods)):
-                            # 计算具体的冲突节次
-                            conflicting_periods = [p for p in periods if p in selected_schedule["periods"]]
-                            
-                            # 添加冲突信息
-                            conflicts.append({
-                                "conflict_course": selected_course["name"],
-                                "new_course": new_course["name"],
-                                "day": day,
-                                "week": week,
-                                "periods": periods,
-                                "conflict_periods": conflicting_periods,
-                                "selected_periods": selected_schedule["periods"]
-                            })
-        
-        return conflicts  # 返回所有冲突信息列表
-    
-
+        return self.selection.conflicts(new_course)  # 返回所有冲突信息列表
     
     def reset_selection(self):
         """重置选修课选择"""
@@ -1300,8 +1368,8 @@ class CourseScheduleApp:
             message = "确定要取消所有已选的选修课吗？"
         
         if messagebox.askyesno(title, message):
-            self.selected_electives.clear()
-            self.update_schedule_display()
+            with self.edit_batch() as batch:
+                batch.clear_selection()
 
     def export_schedule_json(self):
         """导出课表为JSON文件，包含全部选修课程信息"""
@@ -1313,7 +1381,7 @@ class CourseScheduleApp:
             # 询问用户导出的文件名
             filename = tk.filedialog.asksaveasfilename(
                 defaultextension=".json",
-                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+                filetypes=[("JSON files", "*.json"), ("SQLite files", "*.db"), ("All files", "*.*")],
                 title="保存课表文件",
                 initialdir=datas_dir,
                 initialfile=f"course_schedule_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -1322,23 +1390,57 @@ class CourseScheduleApp:
             if not filename:  # 用户取消了选择
                 return
             
-            # 准备导出的数据 - 只导出选修课程数据
-            export_data = {
-                "elective_courses": self.elective_courses,
-                "week_range": self.week_range,
-                "selected_electives": self.selected_electives,
-                "timestamp": datetime.datetime.now().isoformat(),
-                "export_version": "1.0"
-            }
+            # 在后台线程保存为JSON文件或SQLite目录（按扩展名），先取当前数据的快照
+            elective_courses = self.elective_courses
+            selected_electives = self.selected_electives
+            week_range = list(self.week_range)
             
-            # 保存到JSON文件
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
+            def save(progress):
+                save_schedule(filename, elective_courses, selected_electives, week_range, progress)
             
-            messagebox.showinfo("成功", f"选修课程数据已导出到 {filename}")
+            self.run_background_task(
+                "保存课表", save,
+                lambda result: messagebox.showinfo("成功", f"选修课程数据已导出到 {filename}"),
+                lambda e: messagebox.showerror("错误", f"导出课表失败：{str(e)}"))
         except Exception as e:
             messagebox.showerror("错误", f"导出课表失败：{str(e)}")
     
+    def export_schedule_xlsx(self):
+        """导出已选课程为Excel课表：总体课表、每周课表和每门课程的课表"""
+        if not self.selected_electives:
+            messagebox.showinfo("提示", "还没有选择课程")
+            return
+        
+        datas_dir = os.path.join(os.path.dirname(__file__), "..", "datas")
+        os.makedirs(datas_dir, exist_ok=True)
+        filename = tk.filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx")],
+            title="导出Excel课表",
+            initialdir=datas_dir,
+            initialfile=f"course_schedule_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        )
+        if not filename:  # 用户取消了选择
+            return
+        
+        # 在后台线程逐个工作表写出，先取当前数据的快照
+        selected_electives = self.selected_electives
+        week_range = list(self.week_range)
+        
+        def save(progress):
+            save_schedule_xlsx(filename, selected_electives, week_range, progress=progress)
+        
+        def on_error(e):
+            if isinstance(e, ImportError):
+                messagebox.showerror("错误", "导出Excel课表需要安装openpyxl")
+            else:
+                messagebox.showerror("错误", f"导出Excel课表失败：{str(e)}")
+        
+        self.run_background_task(
+            "导出Excel课表", save,
+            lambda result: messagebox.showinfo("成功", f"课表已导出到 {filename}"),
+            on_error)
+    
     def import_schedule_json(self):
         """从JSON文件导入选修课程数据"""
         try:
@@ -1346,11 +1448,11 @@ class CourseScheduleApp:
             datas_dir = os.path.join(os.path.dirname(__file__), "..", "datas")
             os.makedirs(datas_dir, exist_ok=True)
             
-            # 获取datas目录中的所有JSON文件
+            # 获取datas目录中的所有JSON文件和SQLite目录文件
             json_files = []
             if os.path.exists(datas_dir):
-                for file in os.listdir(datas_dir):
-                    if file.endswith('.json'):
+                for file in sorted(os.listdir(datas_dir)):
+                    if file.endswith('.json') or SQLiteCatalogStore.is_store_file(file):
                         json_files.append(file)
             
             # 如果没有找到JSON文件，提示用户
@@ -1376,7 +1478,7 @@ class CourseScheduleApp:
             file_listbox.pack(fill=tk.BOTH, expand=True, pady=10)
             
             # 添加文件到列表框
-            for file in sorted(json_files):
+            for file in json_files:
                 file_listbox.insert(tk.END, file)
             
             # 绑定双击事件
@@ -1423,31 +1525,135 @@ class CourseScheduleApp:
             # 构建完整文件路径
             filename = os.path.join(datas_dir, selected_file)
             
-            # 从JSON文件加载
-            with open(filename, "r", encoding="utf-8") as f:
-                import_data = json.load(f)
+            # 在后台线程读取SQLite目录或JSON文件并验证导入数据格式，完成后一次性替换当前数据
+            def on_loaded(import_data):
+                self.apply_schedule_data(import_data)
+                # 日志中只记录文件名和修改时间，随后立即写快照（不在后台），之后的修改不再依赖这个文件
+                stat = os.stat(filename)
+                self.record_edit("load", filename=os.path.abspath(filename), mtime=stat.st_mtime_ns,
+                                 size=stat.st_size)
+                self.compact_journal(background=False)
+                timestamp = import_data["timestamp"]
+                messagebox.showinfo("成功", f"选修课程数据已导入（导出时间：{timestamp}）\n请从课程列表中选择要添加的课程")
+            
+            def on_error(e):
+                if isinstance(e, ValueError):
+                    messagebox.showerror("错误", str(e))
+                else:
+                    messagebox.showerror("错误", f"导入课表失败：{str(e)}")
             
-            # 验证导入数据格式
-            if "elective_courses" not in import_data:
-                messagebox.showerror("错误", "导入文件格式不正确，缺少选修课程数据")
+            self.run_background_task("加载课表", lambda progress: load_schedule(filename, progress),
+                                     on_loaded, on_error)
+        except Exception as e:
+            messagebox.showerror("错误", f"导入课表失败：{str(e)}")
+    
+    def run_background_task(self, title, function, on_done, on_error):
+        """在后台线程运行function(progress)，显示进度条和取消按钮
+
+        进度和结果通过队列传回，用root.after定期取出；完成时在界面线程调用on_done(返回值)，
+        出错时调用on_error(异常)，取消时不调用。返回BackgroundTask。
+        """
+        task = BackgroundTask(function)
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("360x130")
+        dialog.resizable(False, False)
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        stage_var = tk.StringVar(value="准备中…")
+        ttk.Label(frame, textvariable=stage_var).pack(anchor=tk.W)
+        progress_bar = ttk.Progressbar(frame, length=330, mode="determinate")
+        progress_bar.pack(fill=tk.X, pady=10)
+        
+        def cancel():
+            task.cancel()
+            stage_var.set("正在取消…")
+            cancel_button.config(state=tk.DISABLED)
+        
+        cancel_button = ttk.Button(frame, text="取消", command=cancel)
+        cancel_button.pack(side=tk.RIGHT)
+        dialog.protocol("WM_DELETE_WINDOW", cancel)
+        
+        def poll():
+            for message in task.poll():
+                kind = message[0]
+                if kind == "progress":
+                    _, stage, done, total = message
+                    if not task.cancel_requested:
+                        stage_var.set(stage)
+                    if total:
+                        progress_bar.config(maximum=total, value=done)
+                    continue
+                dialog.destroy()
+                if kind == "done":
+                    on_done(message[1])
+                elif kind == "error":
+                    on_error(message[1])
                 return
+            dialog.after(self.BACKGROUND_POLL_MS, poll)
+        
+        task.start()
+        dialog.after(self.BACKGROUND_POLL_MS, poll)
+        return task
+    
+    def load_schedule_file(self, filename):
+        """读取课表文件并恢复选修课程、周次范围和已选课程，返回读入的数据；格式不正确时抛出ValueError"""
+        import_data = load_schedule(filename)
+        self.apply_schedule_data(import_data)
+        return import_data
+    
+    def apply_schedule_data(self, import_data):
+        """用读入的数据替换选修课程、周次范围和已选课程，界面在空闲时刷新一次"""
+        # 恢复选修课程数据
+        self.elective_courses = import_data["elective_courses"]
+        self.week_range = import_data["week_range"]
+        self.selected_electives = import_data["selected_electives"]
+        
+        # 周次下拉框、选修课列表和课表各刷新一次
+        self.request_refresh(weeks=True, elective=True, schedule=True)
+    
+    def import_registrar_file(self):
+        """从教务系统导出的Excel/CSV课表批量导入选修课程"""
+        try:
+            datas_dir = os.path.join(os.path.dirname(__file__), "..", "datas")
+            os.makedirs(datas_dir, exist_ok=True)
             
-            # 恢复选修课程数据
-            self.elective_courses = import_data["elective_courses"]
-            self.week_range = import_data.get("week_range", (1, 20))
-            self.selected_electives = import_data.get("selected_electives", [])
+            filename = tk.filedialog.askopenfilename(
+                filetypes=[("课表文件", "*.xlsx *.xlsm *.xls *.csv"), ("Excel files", "*.xlsx *.xls"),
+                           ("CSV files", "*.csv"), ("All files", "*.*")],
+                title="批量导入教务系统课表",
+                initialdir=datas_dir
+            )
+            if not filename:  # 用户取消了选择
+                return
             
-            # 更新显示
-            self.update_elective_list()
-            self.update_schedule_display()
-            self.update_week_combo()
+            start_id = self.catalog.next_id
+            try:
+                courses, skipped = read_registrar_file(filename, start_id=start_id)
+            except ImportError as e:
+                messagebox.showerror("错误", f"批量导入需要安装pandas和openpyxl（.xls文件还需要xlrd）\n{e}")
+                return
+            except ValueError as e:
+                messagebox.showerror("错误", str(e))
+                return
             
-            timestamp = import_data.get("timestamp", "未知时间")
-            messagebox.showinfo("成功", f"选修课程数据已导入（导出时间：{timestamp}）\n请从课程列表中选择要添加的课程")
+            # 加入选修课列表，提交后在空闲时刷新一次
+            with self.edit_batch() as batch:
+                for course in courses:
+                    batch.add(course)
+            
+            message = f"已导入 {len(courses)} 个教学班"
+            if skipped:
+                shown = "、".join(str(line) for line in skipped[:20])
+                more = " 等" if len(skipped) > 20 else ""
+                message += f"\n\n跳过 {len(skipped)} 行无法解析的记录（第{shown}{more}行）"
+            messagebox.showinfo("批量导入", message)
         except Exception as e:
-            messagebox.showerror("错误", f"导入课表失败：{str(e)}")
-    
-
+            messagebox.showerror("错误", f"批量导入失败：{str(e)}")
     
     def show_add_course_dialog(self):
         """显示添加课程的对话框"""
@@ -1551,26 +1757,21 @@ class CourseScheduleApp:
             weeks = {info['week'] for info in schedule_info}
             periods = {p for info in schedule_info for p in info['periods']}
             
-            new_course = {
-                "id": max([c.get("id", 0) for c in self.elective_courses] or [0]) + 1,
+            # id在提交时分配
+            new_course = Course.from_dict({
                 "name": course_name,
                 "teacher": teacher,
                 "location": location,
                 "schedule_info": schedule_info,
                 "weeks": sorted(weeks),
                 "periods": sorted(periods)
-            }
+            })
             
-            # 检查冲突
-            conflicts = self.check_course_conflict(new_course)
-            
-            # 添加到选修课列表和已选课程
-            self.elective_courses.append(new_course)
-            self.selected_electives.append(new_course)
-            
-            # 更新显示
-            self.update_elective_list()
-            self.update_schedule_display()
+            # 添加到选修课列表和已选课程，提交时检查冲突，显示在空闲时刷新
+            with self.edit_batch() as batch:
+                batch.add(new_course)
+                batch.select(new_course)
+            conflicts = batch.conflicts.get(new_course["id"])
             
             # 显示结果
             if conflicts:
@@ -1583,9 +1784,226 @@ class CourseScheduleApp:
         
         ttk.Button(button_frame, text="添加课程", command=add_course).pack(side=tk.RIGHT, padx=5)
     
+    def show_solver_dialog(self):
+        """自动排课：选择心愿课程，搜索互不冲突的教学班组合
+
+        不指定排序目标时找到的方案边搜索边显示；指定目标时用分支定界求评分最好的K个方案。
+        """
+        self.merged_catalog.sync(self.catalog)
+        course_names = list(self.merged_catalog.sections)
+        if not course_names:
+            messagebox.showinfo("提示", "选修课列表为空，请先添加或导入课程")
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("自动排课")
+        dialog.geometry("800x500")
+        dialog.transient(self.root)
+        
+        # 左侧：心愿课程（可多选）
+        wish_frame = ttk.LabelFrame(dialog, text="心愿课程（可多选）", padding="10")
+        wish_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(10, 5), pady=10)
+        wish_listbox = tk.Listbox(wish_frame, selectmode=tk.MULTIPLE, width=24, exportselection=False)
+        wish_listbox.pack(fill=tk.BOTH, expand=True)
+        wish_listbox.insert(tk.END, *course_names)
+        keep_selected_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(wish_frame, text="保留其他已选课程", variable=keep_selected_var).pack(anchor=tk.W, pady=(5, 0))
+        
+        # 排序目标和方案个数
+        any_label = "任意无冲突方案"
+        objective_classes = {objective.label: objective for objective in OBJECTIVES}
+        objective_var = tk.StringVar(value=any_label)
+        ttk.Label(wish_frame, text="排序目标：").pack(anchor=tk.W, pady=(10, 0))
+        ttk.Combobox(wish_frame, textvariable=objective_var, values=[any_label, *objective_classes],
+                     state="readonly", width=20).pack(anchor=tk.W)
+        top_frame = ttk.Frame(wish_frame)
+        top_frame.pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(top_frame, text="最好的").pack(side=tk.LEFT)
+        top_k_var = tk.StringVar(value="10")
+        ttk.Entry(top_frame, textvariable=top_k_var, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(top_frame, text="个方案").pack(side=tk.LEFT)
+        
+        # 右侧：找到的方案
+        result_frame = ttk.LabelFrame(dialog, text="无冲突方案", padding="10")
+        result_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 10), pady=10)
+        status_var = tk.StringVar(value="请选择心愿课程后开始搜索")
+        ttk.Label(result_frame, textvariable=status_var).pack(anchor=tk.W)
+        result_scrollbar = ttk.Scrollbar(result_frame)
+        result_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        result_listbox = tk.Listbox(result_frame, yscrollcommand=result_scrollbar.set, exportselection=False)
+        result_listbox.pack(fill=tk.BOTH, expand=True)
+        result_scrollbar.config(command=result_listbox.yview)
+        
+        max_results = 500  # 最多显示的方案数
+        parallel_min_courses = 12  # 心愿课程达到这个数量且有多个CPU时使用进程池并行搜索
+        state = {"solutions": [], "fixed": [], "generator": None, "job": None, "optimizer": None,
+                 "parallel": None}
+        
+        def stop_search():
+            if state["job"] is not None:
+                dialog.after_cancel(state["job"])
+                state["job"] = None
+            state["generator"] = None
+            if state["parallel"] is not None:
+                state["parallel"].cancel()
+                state["parallel"] = None
+        
+        def poll_parallel():
+            # 定期查看进程池的进度，按分支顺序显示已经确定的方案
+            state["job"] = None
+            search = state["parallel"]
+            for solution in search.collect_solutions():
+                show_solution(solution)
+            finished, total = search.progress()
+            if not search.done():
+                status_var.set(f"正在并行搜索……已完成 {finished}/{total} 个分支，找到 {len(state['solutions'])} 个方案")
+                state["job"] = dialog.after(100, poll_parallel)
+                return
+            if search.objectives is not None:
+                for score, solution in search.best():
+                    show_solution(solution, score)
+            search.close()
+            state["parallel"] = None
+            count = len(state["solutions"])
+            status_var.set(f"搜索完成，共 {count} 个方案" if count else "没有找到无冲突的方案")
+        
+        def pump():
+            # 每次最多占用约30毫秒，其余时间交还给界面
+            state["job"] = None
+            generator = state["generator"]
+            optimizer = state["optimizer"]
+            deadline = time.perf_counter() + 0.03
+            while generator is not None and time.perf_counter() < deadline:
+                solution = next(generator, False)
+                if solution is False:
+                    state["generator"] = None
+                    break
+                if optimizer is None:
+                    show_solution(solution)
+            if optimizer is not None and state["generator"] is None:
+                # 优化完成后按评分显示
+                for score, solution in optimizer.results():
+                    show_solution(solution, score)
+            count = len(state["solutions"])
+            if state["generator"] is not None:
+                if optimizer is not None:
+                    status_var.set(f"正在优化……已搜索 {optimizer.nodes} 个分支")
+                else:
+                    status_var.set(f"正在搜索……已找到 {count} 个方案")
+                state["job"] = dialog.after(1, pump)
+            elif count >= max_results:
+                status_var.set(f"已找到 {count} 个方案（只显示前{max_results}个）")
+            else:
+                status_var.set(f"搜索完成，共 {count} 个方案" if count else "没有找到无冲突的方案")
+        
+        def show_solution(solution, score=None):
+            state["solutions"].append(solution)
+            text = "、".join(f"{course['name']}（{course.get('teacher', '未知教师')}）" for course in solution)
+            prefix = f"方案{len(state['solutions'])}" + (f"（评分{score}）" if score is not None else "")
+            result_listbox.insert(tk.END, f"{prefix}：{text}")
+        
+        def start_search():
+            stop_search()
+            names = [course_names[index] for index in wish_listbox.curselection()]
+            if not names:
+                messagebox.showerror("错误", "请选择至少一门心愿课程", parent=dialog)
+                return
+            objective_class = objective_classes.get(objective_var.get())
+            try:
+                top_k = int(top_k_var.get())
+                if not 1 <= top_k <= max_results:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror("错误", f"方案个数应为1-{max_results}之间的整数", parent=dialog)
+                return
+            fixed = []
+            if keep_selected_var.get():
+                fixed = [course for course in self.selected_electives if course["name"] not in names]
+            if len(names) >= parallel_min_courses and (os.cpu_count() or 1) > 1:
+                objectives = None if objective_class is None else [objective_class()]
+                search = ParallelScheduleSearch(self.elective_courses, names, fixed, objectives)
+                if search.missing:
+                    messagebox.showerror("错误", f"以下课程没有可选的教学班：{'、'.join(search.missing)}", parent=dialog)
+                    return
+                state["solutions"] = []
+                state["fixed"] = fixed
+                result_listbox.delete(0, tk.END)
+                if objectives is None:
+                    search.start_search(max_results)
+                else:
+                    search.start_optimize(top_k)
+                state["parallel"] = search
+                poll_parallel()
+                return
+            if objective_class is None:
+                solver = ScheduleSolver(self.elective_courses, names, fixed)
+                generator = solver.solve(limit=max_results)
+                state["optimizer"] = None
+            else:
+                solver = ScheduleOptimizer(self.elective_courses, names, [objective_class()], fixed)
+                generator = solver.run(top_k)
+                state["optimizer"] = solver
+            if solver.missing:
+                messagebox.showerror("错误", f"以下课程没有可选的教学班：{'、'.join(solver.missing)}", parent=dialog)
+                return
+            state["solutions"] = []
+            state["fixed"] = fixed
+            result_listbox.delete(0, tk.END)
+            state["generator"] = generator
+            pump()
+        
+        def apply_solution():
+            selection = result_listbox.curselection()
+            if not selection:
+                messagebox.showerror("错误", "请先选择一个方案", parent=dialog)
+                return
+            stop_search()
+            with self.edit_batch() as batch:
+                batch.set_selection(state["fixed"] + state["solutions"][selection[0]])
+            dialog.destroy()
+            messagebox.showinfo("成功", "已按所选方案更新课表")
+        
+        def stop():
+            if state["parallel"] is not None:
+                search = state["parallel"]
+                stop_search()
+                # 显示已完成的分支中的结果
+                for solution in search.collect_solutions():
+                    show_solution(solution)
+                if search.objectives is not None:
+                    for score, solution in search.best():
+                        show_solution(solution, score)
+                status_var.set(f"已停止，共找到 {len(state['solutions'])} 个方案")
+            elif state["generator"] is not None:
+                stop_search()
+                optimizer = state["optimizer"]
+                if optimizer is not None:
+                    # 显示已找到的较好方案
+                    for score, solution in optimizer.results():
+                        show_solution(solution, score)
+                status_var.set(f"已停止，共找到 {len(state['solutions'])} 个方案")
+        
+        def close():
+            stop_search()
+            dialog.destroy()
+        
+        button_frame = ttk.Frame(result_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="开始搜索", command=start_search).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="停止", command=stop).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="应用方案", command=apply_solution).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="关闭", command=close).pack(side=tk.RIGHT)
+        result_listbox.bind("<Double-1>", lambda event: apply_solution())
+        dialog.protocol("WM_DELETE_WINDOW", close)
+    
     def on_closing(self):
         """窗口关闭事件处理"""
         if messagebox.askyesno("退出", "确定要退出程序吗？"):
+            if self.journal is not None:
+                # 退出前写快照，下次启动时无需重放日志
+                if self.journal.pending_records:
+                    self.compact_journal()
+                self.journal.close()
             self.root.destroy()
     
     def show_today_courses(self):
@@ -1601,23 +2019,8 @@ class CourseScheduleApp:
         # 获取当前选择的周次（统一使用数字类型）
         selected_week = int(self.week_var.get()) if hasattr(self, 'week_var') else self.week_range[0]
         
-        # 收集今日课程
-        today_courses = []
-        
-        # 检查已选选修课
-        for course in self.selected_electives:
-            if "schedule_info" in course:
-                for schedule in course["schedule_info"]:
-                    if schedule["day"] == today_name and schedule["week"] == selected_week:
-                        today_courses.append({
-                            "name": course["name"],
-                            "teacher": course["teacher"],
-                            "periods": schedule["periods"],
-                            "location": course["location"]
-                        })
-        
-        # 按节次排序
-        today_courses.sort(key=lambda x: min(x["periods"]) if x["periods"] else 0)
+        # 收集已选选修课中的今日课程（按节次排序）
+        today_courses = courses_on_day(self.selection, selected_week, today_name)
         
         # 显示结果
         if today_courses:
@@ -1632,79 +2035,127 @@ class CourseScheduleApp:
         
         messagebox.showinfo("今日课程", details)
     
+    def term_overview(self):
+        """整个周次范围的总体课表，已选课程和周次范围不变时直接返回上次的结果"""
+        key = (self.selection.version, tuple(self.week_range))
+        if self._term_overview is None or self._term_overview[0] != key:
+            self._term_overview = (key, TermOverview(self.selection, self.week_range, max(self.periods)))
+        return self._term_overview[1]
+    
+    def show_term_overview(self):
+        """显示总体课表窗口，已经打开时提到最前"""
+        if self.term_overview_dialog is not None:
+            self.term_overview_dialog.dialog.lift()
+            return
+        try:
+            self.term_overview()
+        except ImportError:
+            messagebox.showerror("错误", "显示总体课表需要安装numpy")
+            return
+        self.term_overview_dialog = TermOverviewDialog(self)
+    
     def filter_courses_by_week(self):
         """根据选择的周次过滤课程并更新课表"""
         self.update_elective_list()
         self.update_schedule_display()
 
     def update_schedule_display(self):
-        """更新课表显示"""
-        # 清空现有课表
-        for item in self.schedule_tree.get_children():
-            values = list(self.schedule_tree.item(item)['values'])
-            # 清空所有课程内容，保留节次
-            for i in range(1, len(values)):
-                values[i] = ""
-            self.schedule_tree.item(item, values=values)
-        
+        """更新课表显示，只修改与屏幕内容不同的单元格"""
         # 获取当前选择的周次（统一使用数字类型）
         selected_week = int(self.week_var.get()) if hasattr(self, 'week_var') else self.week_range[0]
+        tk_calls = 1 if hasattr(self, 'week_var') else 0
         
-        # 添加已选选修课
-        for course in self.selected_electives:
-            self.add_course_to_schedule(course, selected_week)
+        # 从缓存取出本周网格，与屏幕内容比对后写入
+        grid = self.week_grids.get(selected_week, self.selection, self.week_range)
+        tk_calls += self.render_schedule_grid(grid)
         
-        # 强制刷新界面
-        self.root.update_idletasks()
+        # 空闲时预先计算相邻周次
+        tk_calls += self.prefetch_adjacent_weeks(selected_week)
+        
+        self.last_refresh_tk_calls = tk_calls
+        if hasattr(self, 'refresh_stats_var'):
+            self.refresh_stats_var.set(f"上次刷新：{tk_calls}次Tk调用")
     
-    def add_course_to_schedule(self, course, selected_week):
-        """将课程添加到课表，正确显示节次信息"""
-        if "schedule_info" in course and course["schedule_info"]:
-            # 处理包含详细时间安排的课程
-            for schedule in course["schedule_info"]:
-                if selected_week == schedule["week"]:
-                    day = schedule["day"]
-                    periods = schedule["periods"]
-                    
-                    # 使用Weekday枚举处理星期，统一类型
-                    weekday_enum = Weekday.from_name(day)
-                    day_num = weekday_enum.to_column_index()
-                    
-                    # 添加课程到课表
-                    if periods:
-                        # 对于连续的节次范围，使用范围显示
-                        # 如果是单节次
-                        if len(periods) == 1:
-                            period = periods[0]
-                            if 1 <= period <= 10:  # 确保节次在有效范围内
-                                # 找到对应的行（节次）
-                                for item in self.schedule_tree.get_children():
-                                    values = list(self.schedule_tree.item(item)['values'])
-                                    if values[0] == period:  # 第0列是节次
-                                        current_content = values[day_num]  # 对应的星期列
-                                        if current_content:
-                                            # 如果已有内容，添加分隔符和新课程
-                                            values[day_num] = f"{current_content} | {course['name']}"
-                                        else:
-                                            values[day_num] = course['name']
-                                        self.schedule_tree.item(item, values=values)
-                        else:
-                            # 对于多节次课程，确保所有节次都被正确显示
-                            for period in periods:
-                                if 1 <= period <= 10:  # 确保节次在有效范围内
-                                    # 找到对应的行（节次）
-                                    for item in self.schedule_tree.get_children():
-                                        values = list(self.schedule_tree.item(item)['values'])
-                                        if values[0] == period:  # 第0列是节次
-                                            current_content = values[day_num]  # 对应的星期列
-                                            if current_content:
-                                                # 如果已有内容，添加分隔符和新课程
-                                                values[day_num] = f"{current_content} | {course['name']}"
-                                            else:
-                                                values[day_num] = course['name']
-                                            self.schedule_tree.item(item, values=values)
+    def render_schedule_grid(self, grid):
+        """将网格写入课表，只修改变化的单元格，返回发出的Tk调用次数"""
+        tk_calls = 0
+        for period, row, shown in zip(self.periods, grid, self.displayed_grid):
+            if row == shown:
+                continue
+            item = self.period_rows[period]
+            for day, text, old_text in zip(self.days, row, shown):
+                if text != old_text:
+                    self.schedule_tree.set(item, day, text)
+                    tk_calls += 1
+        self.displayed_grid = grid
+        
+        if tk_calls:
+            # 有变化时强制刷新界面
+            self.root.update_idletasks()
+            tk_calls += 1
+        return tk_calls
+    
+    def prefetch_adjacent_weeks(self, week):
+        """在界面空闲时预先计算上一周和下一周的课表网格，返回发出的Tk调用次数"""
+        tk_calls = 0
+        if self._prefetch_job is not None:
+            self.root.after_cancel(self._prefetch_job)
+            self._prefetch_job = None
+            tk_calls += 1
+        
+        # 相邻周次都已缓存时无需再安排
+        neighbours = [neighbour for neighbour in (week - 1, week + 1)
+                      if self.week_range[0] <= neighbour <= self.week_range[1]
+                      and neighbour not in self.week_grids.grids]
+        if not neighbours:
+            return tk_calls
+        
+        def prefetch():
+            self._prefetch_job = None
+            for neighbour in neighbours:
+                self.week_grids.get(neighbour, self.selection, self.week_range)
+        
+        self._prefetch_job = self.root.after_idle(prefetch)
+        return tk_calls + 1
+
+def enable_tracing(tracer):
+    """替换界面和核心逻辑中的方法，记录每次调用的耗时
+
+    CourseScheduleApp、TimeSelectionDialog和TermOverviewDialog的全部方法（按钮命令、下拉框事件、刷新方法等）记为"ui"，
+    合并目录、冲突检查和按周网格的计算记为"core"，以区分耗时花在计算还是Tk调用上。
+    必须在创建CourseScheduleApp之前调用，按钮保存的是创建时的绑定方法。
+    """
+    tracer.instrument(CourseScheduleApp, "ui")
+    tracer.instrument(TimeSelectionDialog, "ui")
+    tracer.instrument(TermOverviewDialog, "ui")
+    tracer.instrument(MergedCatalog, "core", ("sync", "entries"))
+    tracer.instrument(SelectionModel, "core", ("conflicts", "reset"))
+    tracer.instrument(WeekGridCache, "core", ("get",))
+    tracer.instrument(TermOverview, "core", ("__init__",))
+
 
 if __name__ == "__main__":
+    # 性能追踪：--trace [文件名] 或环境变量COURSE_SCHEDULE_TRACE，退出时写出Chrome trace文件
+    trace_file = trace_output(sys.argv[1:])
+    tracer = None
+    if trace_file:
+        tracer = Tracer()
+        enable_tracing(tracer)
+
     root = tk.Tk()
     app = CourseScheduleApp(root)
-    root.mainloop()
\ No newline at end of file
+    if tracer is not None:
+        TraceOverlay(root, tracer, trace_file)
+
+    # 启动时间测试（benchmarks/bench_startup.py）：首帧绘制完成后输出时间戳并退出
+    if os.environ.get("COURSE_SCHEDULE_STARTUP_PROBE"):
+        def report_first_paint():
+            print(f"FIRST_PAINT {time.time():.6f}", flush=True)
+            root.after_idle(root.destroy)
+        app.first_paint_callbacks.append(report_first_paint)
+    
+    try:
+        root.mainloop()
+    finally:
+        if tracer is not None:
+            print(f"追踪文件：{tracer.export(trace_file)}")
\ No newline at end of file
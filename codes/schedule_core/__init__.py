@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""课表核心逻辑（不依赖tkinter）
+
+包含课程数据模型、冲突检测、已选课程、按id索引的选修课列表和目录、批量修改（事务）、按周课表网格和学期总体课表、读写功能（可在后台线程中运行并报告进度）、Excel课表导出、编辑日志（自动保存和崩溃恢复）、教务系统课表的批量导入、自动排课、选课方案优化和性能追踪，
+界面程序course-schedule.py只负责显示和交互，批处理脚本和测试可以直接导入本包。
+"""
+
+from .model import (
+    DAY_NAMES,
+    EXPORT_VERSION,
+    WEEKDAY_BY_NAME,
+    Course,
+    ScheduleSlot,
+    WeekPattern,
+    Weekday,
+    compress_schedule,
+    expand_patterns,
+    format_weeks,
+    intern_periods,
+    intern_text,
+    model_to_json,
+    parse_weeks,
+)
+from .conflict import (
+    DAY_INDEX,
+    OVERFLOW_BIT,
+    PERIOD_BITS,
+    CourseOccupancy,
+    build_occupancy_tensor,
+    conflict_matrix,
+    slot_bit,
+)
+from .selection import SelectionModel
+from .catalog import CourseCatalog, MergedCatalog, merge_course_sections
+from .batch import EditBatch
+from .timetable import TermOverview, WeekGridCache, courses_on_day
+from .storage import (
+    SQLiteCatalogStore,
+    atomic_write,
+    build_export_data,
+    load_schedule,
+    parse_schedule_data,
+    save_schedule,
+    write_json,
+)
+from .workbook import save_schedule_xlsx
+from .solver import ScheduleSolver, group_sections, section_mask
+from .optimizer import (
+    OBJECTIVES,
+    CellMasks,
+    EarlyClassObjective,
+    IdleGapObjective,
+    Objective,
+    ScheduleOptimizer,
+    StudyDaysObjective,
+)
+from .parallel import ParallelScheduleSearch
+from .registrar import is_registrar_file, parse_registrar_frame, read_registrar_file
+from .background import BackgroundTask, TaskCancelled
+from .journal import ScheduleJournal, apply_record
+from .tracing import TRACE_ENV, TRACE_OPTION, Tracer, trace_output
+
+__all__ = [
+    "DAY_NAMES", "EXPORT_VERSION", "WEEKDAY_BY_NAME", "Course", "ScheduleSlot", "WeekPattern", "Weekday",
+    "compress_schedule", "expand_patterns", "format_weeks", "intern_periods", "intern_text", "model_to_json",
+    "parse_weeks",
+    "DAY_INDEX", "OVERFLOW_BIT", "PERIOD_BITS", "CourseOccupancy", "build_occupancy_tensor", "conflict_matrix",
+    "slot_bit",
+    "SelectionModel",
+    "CourseCatalog", "MergedCatalog", "merge_course_sections",
+    "EditBatch",
+    "TermOverview", "WeekGridCache", "courses_on_day",
+    "SQLiteCatalogStore", "atomic_write", "build_export_data", "load_schedule", "parse_schedule_data", "save_schedule",
+    "write_json",
+    "save_schedule_xlsx",
+    "ScheduleSolver", "group_sections", "section_mask",
+    "OBJECTIVES", "CellMasks", "EarlyClassObjective", "IdleGapObjective", "Objective", "ScheduleOptimizer",
+    "StudyDaysObjective",
+    "ParallelScheduleSearch",
+    "is_registrar_file", "parse_registrar_frame", "read_registrar_file",
+    "BackgroundTask", "TaskCancelled",
+    "ScheduleJournal", "apply_record",
+    "TRACE_ENV", "TRACE_OPTION", "Tracer", "trace_output",
+]
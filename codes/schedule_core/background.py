@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""后台任务：在工作线程中运行耗时的读写，通过队列把进度和结果交给界面线程
+
+工作线程不接触任何界面对象；界面线程用root.after定期调用poll取出消息并更新界面。
+"""
+
+import queue
+import threading
+
+
+class TaskCancelled(Exception):
+    """后台任务被取消"""
+
+
+class BackgroundTask:
+    """在后台线程中运行function(progress)
+
+    progress为回调progress(阶段说明, 已完成数, 总数)，由function定期调用；取消后下一次回调
+    抛出TaskCancelled，function中的代码无需另外检查取消标志。
+    poll返回的消息：
+    - ("progress", 阶段说明, 已完成数, 总数)
+    - ("done", 返回值)
+    - ("error", 异常)
+    - ("cancelled",)
+    取消是尽力而为的：function在下一次回调之前已经完成时仍然返回("done", 返回值)。
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.messages = queue.Queue()
+        self.finished = False  # poll已经取出结果（done/error/cancelled）
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def progress(self, stage, done, total):
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+        self.messages.put(("progress", stage, done, total))
+
+    def _run(self):
+        try:
+            result = self.function(self.progress)
+        except TaskCancelled:
+            self.messages.put(("cancelled",))
+        except Exception as e:
+            self.messages.put(("error", e))
+        else:
+            self.messages.put(("done", result))
+
+    def poll(self):
+        """取出目前所有的消息；连续的进度消息只保留最后一条"""
+        messages = []
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "progress" and messages and messages[-1][0] == "progress":
+                messages[-1] = message
+            else:
+                messages.append(message)
+            if message[0] != "progress":
+                self.finished = True
+        return messages
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""批量修改：把多项修改作为一个事务一起提交"""
+
+
+class EditBatch:
+    """一组一起提交的修改
+
+    用法：
+        with EditBatch(catalog, merged_catalog, selection) as batch:
+            batch.add(course)
+            batch.select(course)
+    with块中的调用只登记修改；正常退出时按顺序应用到catalog（CourseCatalog）、merged_catalog
+    （MergedCatalog）和selection（SelectionModel），再对提交后仍在已选课程中的相关课程和被编辑的
+    课程做一次冲突检查。with块中抛出异常时不做任何修改。
+    提交后：
+    - conflicts：{课程id: 冲突列表}，只包含存在冲突的课程
+    - records：对应的编辑日志记录（格式见journal.apply_record）
+    - catalog_changed / selection_changed：选修课列表和已选课程是否有变化
+    - week_range：set_week_range设置的新周次范围，没有设置时为None
+    on_commit在提交后以本对象为参数调用，供界面刷新和写日志。
+    """
+
+    def __init__(self, catalog, merged_catalog, selection, on_commit=None):
+        self.catalog = catalog
+        self.merged_catalog = merged_catalog
+        self.selection = selection
+        self.on_commit = on_commit
+        self.operations = []
+        self.records = []
+        self.conflicts = {}
+        self.catalog_changed = False
+        self.selection_changed = False
+        self.week_range = None
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+    def add(self, course):
+        """加入选修课；没有id的课程在提交时分配id，with块中抛出异常时不占用id"""
+        self.operations.append(("add", course))
+
+    def edit(self, course_id, course):
+        """用新的记录替换课程（包括已选课程中的同id记录）"""
+        self.operations.append(("edit", (course_id, course)))
+
+    def remove(self, course_id):
+        """删除一门课程"""
+        self.operations.append(("delete", course_id))
+
+    def remove_name(self, name):
+        """删除指定名称的全部课程"""
+        self.operations.append(("delete_name", name))
+
+    def select(self, course):
+        self.operations.append(("select", course))
+
+    def deselect_name(self, name):
+        self.operations.append(("deselect_name", name))
+
+    def clear_selection(self):
+        self.operations.append(("clear_selection", None))
+
+    def set_selection(self, courses):
+        self.operations.append(("set_selection", list(courses)))
+
+    def set_week_range(self, week_range):
+        self.operations.append(("week_range", list(week_range)))
+
+    def _record(self, op, **fields):
+        # 连续加入的课程合并为一条记录
+        if op == "add" and self.records and self.records[-1]["op"] == "add":
+            self.records[-1]["courses"].extend(fields["courses"])
+        else:
+            self.records.append({"op": op, **fields})
+
+    def commit(self):
+        """按顺序应用登记的修改，然后做一次冲突检查"""
+        if self.committed:
+            return
+        self.committed = True
+        catalog = self.catalog
+        merged_catalog = self.merged_catalog
+        selection = self.selection
+        edited = {}  # 被编辑的课程 id -> course
+        selected = {}  # 本批次选中的课程 id -> course
+
+        for op, value in self.operations:
+            if op == "add":
+                catalog.add(value)
+                merged_catalog.add(value)
+                self.catalog_changed = True
+                self._record("add", courses=[value.to_dict(compact=True)])
+            elif op == "edit":
+                course_id, course = value
+                old = catalog.replace(course_id, course)
+                if old is not None:
+                    merged_catalog.replace(old, course)
+                else:
+                    merged_catalog.add(course)
+                if course_id in selection:
+                    selection.replace(course_id, course)
+                    self.selection_changed = True
+                self.catalog_changed = True
+                edited[course["id"]] = course
+                self._record("edit", course=course.to_dict(compact=True))
+            elif op == "delete":
+                old = catalog.remove(value)
+                if old is not None:
+                    merged_catalog.remove(old)
+                    self.catalog_changed = True
+                if selection.remove(value) is not None:
+                    self.selection_changed = True
+                edited.pop(value, None)
+                selected.pop(value, None)
+                self._record("delete", id=value)
+            elif op == "delete_name":
+                if catalog.remove_name(value):
+                    merged_catalog.remove_name(value)
+                    self.catalog_changed = True
+                self.selection_changed |= bool(selection.remove_name(value))
+                edited = {key: course for key, course in edited.items() if course["name"] != value}
+                selected = {key: course for key, course in selected.items() if course["name"] != value}
+                self._record("delete_name", name=value)
+            elif op == "select":
+                selection.add(value)
+                self.selection_changed = True
+                selected[value["id"]] = value
+                # 选中的可能是合并了各教学班的课程，记录完整的课程而不只是id
+                self._record("select", course=value.to_dict(compact=True))
+            elif op == "deselect_name":
+                self.selection_changed |= bool(selection.remove_name(value))
+                selected = {key: course for key, course in selected.items() if course["name"] != value}
+                self._record("deselect_name", name=value)
+            elif op == "clear_selection":
+                selection.clear()
+                selected.clear()
+                self.selection_changed = True
+                self._record("clear_selection")
+            elif op == "set_selection":
+                selection.reset(value)
+                self.selection_changed = True
+                selected = {course["id"]: course for course in value}
+                self._record("set_selection", courses=[course.to_dict(compact=True) for course in value])
+            elif op == "week_range":
+                self.week_range = value
+                self._record("week_range", week_range=value)
+
+        # 一次冲突检查：已选课程与其余已选课程比较，编辑过但未选的课程与全部已选课程比较
+        for course_id, course in {**edited, **selected}.items():
+            if course_id in selection:
+                conflicts = selection.conflicts(selection.courses[course_id], exclude_id=course_id)
+            elif course_id in edited and course_id in catalog:
+                conflicts = selection.conflicts(course)
+            else:
+                continue
+            if conflicts:
+                self.conflicts[course_id] = conflicts
+
+        if self.on_commit is not None:
+            self.on_commit(self)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""选修课列表：按id索引的课程集合，以及按课程名称合并的选修课目录"""
+
+from .model import Course, intern_periods
+
+
+def merge_course_sections(course_name, sections):
+    """将同名课程的所有记录合并为一条完整的课程记录，合并所有节次、周次、教师和地点"""
+    schedule_info = []  # 存储所有时间安排信息
+    all_periods = set()  # 存储所有节次
+    all_weeks = set()  # 存储所有周次
+    all_teachers = set()  # 存储所有教师
+    all_locations = set()  # 存储所有地点
+    
+    # 所有记录都还是压缩格式时直接拼接WeekPattern，推迟到需要时再展开
+    patterns = [course.pending_patterns() for course in sections]
+    lazy = all(pattern_list is not None for pattern_list in patterns)
+    
+    for course in sections:
+        # 合并时间安排信息
+        if not lazy and "schedule_info" in course:
+            schedule_info.extend(course["schedule_info"])
+        
+        # 合并节次信息
+        if "periods" in course:
+            for period in course["periods"]:
+                all_periods.add(period)
+        
+        # 合并周次信息（载入时已统一为整数）
+        if course.weeks:
+            all_weeks.update(course.weeks)
+        
+        # 合并教师信息
+        if "teacher" in course and course["teacher"] and course["teacher"] != "未知教师":
+            all_teachers.add(course["teacher"])
+        
+        # 合并地点信息
+        if "location" in course and course["location"] and course["location"] != "未知地点":
+            all_locations.add(course["location"])
+    
+    # 格式化教师和地点信息
+    teachers = ", ".join(sorted(all_teachers)) if all_teachers else "未知教师"
+    locations = ", ".join(sorted(all_locations)) if all_locations else "未知地点"
+    
+    merged_course = Course(
+        id=sections[0]["id"],
+        name=course_name,
+        teacher=teachers,
+        location=locations,
+        schedule_info=schedule_info,
+        weeks=tuple(sorted(all_weeks)),  # 统一使用数字类型
+        periods=intern_periods(sorted(all_periods))
+    )
+    if lazy:
+        merged_course.patterns = [pattern for pattern_list in patterns for pattern in pattern_list]
+    return merged_course
+
+
+class CourseCatalog:
+    """选修课列表，维护 id -> 课程 和 名称 -> {id} 两个索引
+
+    按id查找、添加、替换、删除课程都只访问该课程本身，与课程总数无关；删除某个名称的全部课程
+    只访问该名称下的记录。next_id为单调递增的id分配器，始终大于已经出现过的所有id，
+    删除课程后也不会重复分配。加入的课程没有id时分配新的id，id与已有课程重复时抛出ValueError
+    （静默换号会让已选课程中按原id引用的记录对应到另一门课程）。
+    """
+
+    def __init__(self, courses=None):
+        self.courses = {}  # course_id -> course，保持加入顺序
+        self._names = {}  # 课程名称 -> {course_id: None}，保持加入顺序
+        self.next_id = 1
+        self.version = 0  # 每次修改加一
+        for course in courses or []:
+            self.add(course)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def __iter__(self):
+        return iter(list(self.courses.values()))
+
+    def __contains__(self, course_id):
+        return course_id in self.courses
+
+    def get(self, course_id):
+        """按id查找课程，不存在时返回None"""
+        return self.courses.get(course_id)
+
+    def as_list(self):
+        """按加入顺序返回课程列表"""
+        return list(self.courses.values())
+
+    def ids_for_name(self, name):
+        """指定名称的全部课程id，按加入顺序"""
+        return list(self._names.get(name, ()))
+
+    def allocate_id(self):
+        """分配一个新的课程id"""
+        course_id = self.next_id
+        self.next_id += 1
+        return course_id
+
+    def add(self, course):
+        """加入课程，返回其id；id与已有课程重复时抛出ValueError"""
+        course_id = course.get("id")
+        if course_id is None:
+            course_id = course["id"] = self.allocate_id()
+        elif course_id in self.courses:
+            raise ValueError(f"课程id重复：{course_id}")
+        elif isinstance(course_id, int) and course_id >= self.next_id:
+            self.next_id = course_id + 1
+        self.courses[course_id] = course
+        self._names.setdefault(course["name"], {})[course_id] = None
+        self.version += 1
+        return course_id
+
+    def extend(self, courses):
+        for course in courses:
+            self.add(course)
+
+    def replace(self, course_id, course):
+        """用新的记录替换课程，保留原有位置，返回被替换的课程；课程不存在时加入并返回None"""
+        old = self.courses.get(course_id)
+        if old is None:
+            self.add(course)
+            return None
+        if course.get("id") != course_id:
+            course["id"] = course_id
+        self._discard_name(old["name"], course_id)
+        self.courses[course_id] = course
+        self._names.setdefault(course["name"], {})[course_id] = None
+        self.version += 1
+        return old
+
+    def remove(self, course_id):
+        """删除课程，返回被删除的课程"""
+        course = self.courses.pop(course_id, None)
+        if course is not None:
+            self._discard_name(course["name"], course_id)
+            self.version += 1
+        return course
+
+    def remove_name(self, name):
+        """删除指定名称的全部课程，返回被删除的课程列表"""
+        return [self.remove(course_id) for course_id in self.ids_for_name(name)]
+
+    def _discard_name(self, name, course_id):
+        ids = self._names.get(name)
+        if ids is not None:
+            ids.pop(course_id, None)
+            if not ids:
+                del self._names[name]
+
+
+class MergedCatalog:
+    """按课程名称合并后的选修课目录
+
+    记录每个名称下的课程记录，合并结果按名称缓存；课程增删改时只让对应名称的缓存失效。
+    跟踪的课程列表（或CourseCatalog）对象被整体替换（如导入文件）时重新建立索引。
+    """
+
+    def __init__(self):
+        self.courses = None  # 当前跟踪的课程列表或CourseCatalog
+        self.sections = {}  # 课程名称 -> [course, ...]，按名称首次出现的顺序
+        self.merged = {}  # 课程名称 -> 合并后的课程记录
+        self.version = 0  # 目录内容每次变化加一
+        self._entries = None  # (version, [(显示文本, 合并后的课程), ...])
+
+    def sync(self, courses):
+        """跟踪的课程集合对象变化时重建名称索引"""
+        if courses is self.courses:
+            return
+        self.courses = courses
+        self.sections = {}
+        for course in courses:
+            self.sections.setdefault(course["name"], []).append(course)
+        self.merged.clear()
+        self.version += 1
+
+    def add(self, course):
+        """登记新加入列表的课程"""
+        self.sections.setdefault(course["name"], []).append(course)
+        self.invalidate(course["name"])
+
+    def replace(self, old_course, new_course):
+        """登记列表中被替换的课程记录"""
+        sections = self.sections.get(old_course["name"], [])
+        for index, course in enumerate(sections):
+            if course is old_course:
+                if new_course["name"] == old_course["name"]:
+                    sections[index] = new_course
+                else:
+                    del sections[index]
+                    if not sections:
+                        del self.sections[old_course["name"]]
+                    self.sections.setdefault(new_course["name"], []).append(new_course)
+                break
+        self.invalidate(old_course["name"])
+        self.invalidate(new_course["name"])
+
+    def remove(self, course):
+        """登记从列表中删除的一条课程记录"""
+        sections = self.sections.get(course["name"], [])
+        for index, section in enumerate(sections):
+            if section is course:
+                del sections[index]
+                if not sections:
+                    del self.sections[course["name"]]
+                break
+        self.invalidate(course["name"])
+
+    def remove_name(self, name):
+        """登记从列表中删除的同名课程"""
+        self.sections.pop(name, None)
+        self.invalidate(name)
+
+    def invalidate(self, name):
+        """使指定名称的合并结果失效"""
+        self.merged.pop(name, None)
+        self.version += 1
+
+    def entries(self):
+        """返回 [(显示文本, 合并后的课程), ...]，未变化的课程直接使用缓存"""
+        if self._entries is not None and self._entries[0] == self.version:
+            return self._entries[1]
+        
+        entries = []
+        for course_name, sections in self.sections.items():
+            merged_course = self.merged.get(course_name)
+            if merged_course is None:
+                merged_course = self.merged[course_name] = merge_course_sections(course_name, sections)
+            # 创建课程显示文本
+            entries.append((f"{course_name} - {merged_course['teacher']}", merged_course))
+        self._entries = (self.version, entries)
+        return entries
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""时间冲突检测：占用位图和全目录的冲突矩阵"""
+
+from .model import Weekday
+
+
+# 占用位图中每天预留的节次位数（支持第1-16节）
+PERIOD_BITS = 16
+# 溢出位：无法编码的时间（周次非数字、节次越界等）统一记到第0位，只会产生误报，由精确比对排除
+OVERFLOW_BIT = 1
+
+
+def slot_bit(week, day, period):
+    """计算(周次, 星期, 节次)在占用位图中对应的位"""
+    try:
+        week = int(week)
+        period = int(period)
+    except (ValueError, TypeError):
+        return OVERFLOW_BIT
+    if week < 0 or not 1 <= period <= PERIOD_BITS:
+        return OVERFLOW_BIT
+    day_index = week * 7 + Weekday.from_name(day).value - 1
+    return 1 << (1 + day_index * PERIOD_BITS + period - 1)
+
+
+class CourseOccupancy:
+    """课程的(周次, 星期, 节次)占用位图，每门课程只编译一次"""
+    __slots__ = ("course", "schedule_info", "mask", "slots", "by_day")
+
+    def __init__(self, course):
+        self.course = course
+        self.schedule_info = course.get("schedule_info")
+        self.mask = 0
+        self.slots = []  # [(schedule, 该时间安排的位图), ...]，保持原始顺序
+        self.by_day = {}  # (week, day) -> [schedule, ...]，用于还原冲突详情
+
+        for schedule in self.schedule_info or []:
+            week = schedule["week"]
+            day = schedule["day"]
+            schedule_mask = 0
+            for period in schedule["periods"]:
+                schedule_mask |= slot_bit(week, day, period)
+            self.mask |= schedule_mask
+            self.slots.append((schedule, schedule_mask))
+            self.by_day.setdefault((week, day), []).append(schedule)
+
+    def conflicts_with(self, others):
+        """与一组已编译课程做按位与，返回详细冲突信息列表
+
+        位图只作为快速筛选，冲突详情仍按原来的逐条比对规则从相交的(周次, 星期)中还原。
+        """
+        candidates = [other for other in others if self.mask & other.mask]
+        if not candidates:
+            return []
+
+        conflicts = []
+        new_course = self.course
+        for schedule, schedule_mask in self.slots:
+            day = schedule["day"]
+            periods = schedule["periods"]
+            week = schedule["week"]
+            for other in candidates:
+                if not schedule_mask & other.mask:
+                    continue
+                for selected_schedule in other.by_day.get((week, day), ()):
+                    selected_periods = selected_schedule["periods"]
+                    conflicting_periods = [p for p in periods if p in selected_periods]
+                    if conflicting_periods:
+                        conflicts.append({
+                            "conflict_course": other.course["name"],
+                            "new_course": new_course["name"],
+                            "day": day,
+                            "week": week,
+                            "periods": periods,
+                            "conflict_periods": conflicting_periods,
+                            "selected_periods": selected_periods
+                        })
+        return conflicts
+
+
+# 星期名称 -> 张量中的星期下标（0-6）
+DAY_INDEX = {day.to_name(): day.value - 1 for day in Weekday}
+
+
+def build_occupancy_tensor(courses, week_range=None, period_count=PERIOD_BITS):
+    """将课程列表转换为 (课程数, 周数, 7, 节次数) 的布尔占用张量
+
+    week_range为None时使用课程中出现的最小和最大周次；范围外的周次、
+    非法的星期名称和越界节次不参与冲突判断。返回 (张量, 起始周次)。
+    逐条比对（CourseOccupancy.conflicts_with）按原值比较周次，字符串"3"与整数3不是同一周，
+    因此这里只放入整数周次，不做int转换；无法规范化的字符串周次不在张量中，不参与冲突判断。
+    """
+    import numpy as np
+
+    # 先收集所有占用的下标，最后一次性写入张量
+    rows, weeks, days, periods = [], [], [], []
+    for row, course in enumerate(courses):
+        for schedule in course.get("schedule_info") or []:
+            day = DAY_INDEX.get(schedule["day"])
+            if day is None:
+                continue
+            week = schedule["week"]
+            if not isinstance(week, int) or isinstance(week, bool):
+                continue
+            for period in schedule["periods"]:
+                if isinstance(period, int) and 1 <= period <= period_count:
+                    rows.append(row)
+                    weeks.append(week)
+                    days.append(day)
+                    periods.append(period - 1)
+
+    weeks = np.asarray(weeks, dtype=np.int64)
+    if week_range is None:
+        week_range = (int(weeks.min()), int(weeks.max())) if len(weeks) else (1, 1)
+    first_week, last_week = week_range
+
+    tensor = np.zeros((len(courses), last_week - first_week + 1, 7, period_count), dtype=bool)
+    in_range = (weeks >= first_week) & (weeks <= last_week)
+    tensor[np.asarray(rows, dtype=np.int64)[in_range],
+           weeks[in_range] - first_week,
+           np.asarray(days, dtype=np.int64)[in_range],
+           np.asarray(periods, dtype=np.int64)[in_range]] = True
+    return tensor, first_week
+
+
+def conflict_matrix(tensor, chunk_size=None):
+    """由占用张量计算课程两两之间的冲突矩阵（对角线为False）
+
+    chunk_size指定每批处理的行数，用于限制大目录下的内存占用；None表示一次算完。
+    张量保持布尔类型，每次只把一块行和一块列转换为float32相乘，
+    临时内存与chunk_size成正比，而不是与课程总数成正比。
+    """
+    import numpy as np
+
+    count = tensor.shape[0]
+    # 展平为 (课程数, 时间格数)，用矩阵乘法统计共同占用的时间格数
+    flat = tensor.reshape(count, int(np.prod(tensor.shape[1:])))
+    result = np.empty((count, count), dtype=bool)
+
+    step = chunk_size or count or 1
+    for start in range(0, count, step):
+        stop = min(start + step, count)
+        rows = flat[start:stop].astype(np.float32)
+        for column in range(0, count, step):
+            column_stop = min(column + step, count)
+            result[start:stop, column:column_stop] = (
+                rows @ flat[column:column_stop].astype(np.float32).T) > 0
+    np.fill_diagonal(result, False)
+    return result
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""编辑日志：自动保存和崩溃恢复
+
+每次修改（添加、编辑、删除课程，选课、退选，修改周次范围等）立即追加一行JSON到日志文件，
+不必每次重写整个课表。日志分段保存（journal-000001.jsonl、journal-000002.jsonl ...），
+压缩时切换到新的一段，在后台线程把当时的状态写为快照（先写临时文件再替换），写完后删除
+快照已经包含的旧日志段。启动时读取快照，再重放快照之后的日志段，恢复到最后一次修改的状态。
+
+崩溃发生在写日志的中途时，最后一行不完整，重放时忽略。
+"""
+
+import glob
+import json
+import os
+import re
+import threading
+
+from .model import Course
+from .storage import atomic_write, build_export_data, load_schedule, parse_schedule_data, write_json
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PATTERN = re.compile(r"journal-(\d+)\.jsonl$")
+
+
+def _find(courses, course_id):
+    for course in courses:
+        if course.get("id") == course_id:
+            return course
+    return None
+
+
+def apply_record(state, record):
+    """把一条日志记录应用到状态上（就地修改）
+
+    state的结构与load_schedule的返回值相同：elective_courses、selected_electives、week_range。
+    记录的op：
+    - add：courses为新增的课程列表
+    - edit：course为修改后的课程，按id替换选修课列表和已选课程中的记录（选修课列表中没有时加入）
+    - delete：id，删除一门课程
+    - delete_name：name，删除该名称的全部课程
+    - select：course为选中的课程（界面中选中的是合并了各教学班的课程，不能只按id从选修课列表中查找；
+      只有id的旧记录仍按id查找）
+    - deselect_name：name，退选该名称的课程
+    - set_selection：courses，已选课程改为这些课程（只有ids的旧记录按id查找）
+    - clear_selection：清空已选课程
+    - week_range：week_range
+    - load：filename、mtime、size，从课表文件载入全部数据（导入课表时记录文件名，而不是整个课表）；
+      文件已被修改或移动时抛出ValueError，不载入不同的数据
+    - batch：records，一起提交的一组记录（EditBatch），整体写为一行，重放时要么全部应用要么全部跳过
+    """
+    op = record["op"]
+    electives = state["elective_courses"]
+    selected = state["selected_electives"]
+    if op == "add":
+        electives.extend(Course.from_dict(course) for course in record["courses"])
+    elif op == "edit":
+        course = Course.from_dict(record["course"])
+        for courses in (electives, selected):
+            for index, old in enumerate(courses):
+                if old.get("id") == course["id"]:
+                    courses[index] = course
+                    break
+            else:
+                # 与CourseCatalog.replace一致：选修课列表中不存在时加入
+                if courses is electives:
+                    electives.append(course)
+    elif op == "delete":
+        electives[:] = [course for course in electives if course.get("id") != record["id"]]
+        selected[:] = [course for course in selected if course.get("id") != record["id"]]
+    elif op == "delete_name":
+        electives[:] = [course for course in electives if course["name"] != record["name"]]
+        selected[:] = [course for course in selected if course["name"] != record["name"]]
+    elif op == "select":
+        if "course" in record:
+            course = Course.from_dict(record["course"])
+            selected[:] = [old for old in selected if old.get("id") != course["id"]]
+            selected.append(course)
+        else:
+            course = _find(electives, record["id"])
+            if course is not None and _find(selected, record["id"]) is None:
+                selected.append(course)
+    elif op == "deselect_name":
+        selected[:] = [course for course in selected if course["name"] != record["name"]]
+    elif op == "set_selection":
+        if "courses" in record:
+            selected[:] = [Course.from_dict(course) for course in record["courses"]]
+        else:
+            courses = [_find(electives, course_id) or _find(selected, course_id) for course_id in record["ids"]]
+            selected[:] = [course for course in courses if course is not None]
+    elif op == "clear_selection":
+        selected.clear()
+    elif op == "week_range":
+        state["week_range"] = list(record["week_range"])
+    elif op == "batch":
+        for item in record["records"]:
+            apply_record(state, item)
+    elif op == "load":
+        stat = os.stat(record["filename"])
+        if "mtime" in record and (stat.st_mtime_ns != record["mtime"] or stat.st_size != record["size"]):
+            raise ValueError(f"导入的课表文件已被修改：{record['filename']}")
+        loaded = load_schedule(record["filename"])
+        state["elective_courses"] = loaded["elective_courses"]
+        state["selected_electives"] = loaded["selected_electives"]
+        state["week_range"] = loaded["week_range"]
+    else:
+        raise ValueError(f"未知的日志记录：{op}")
+
+
+class ScheduleJournal:
+    """追加写入的编辑日志，保存在directory中
+
+    append在界面线程中调用，每条记录写入后立即同步到磁盘；compact在后台线程写快照。
+    pending_records为最近一次快照之后的记录数，超过compact_records时应当压缩。
+    """
+
+    COMPACT_RECORDS = 200
+
+    def __init__(self, directory, compact_records=COMPACT_RECORDS):
+        self.directory = directory
+        self.compact_records = compact_records
+        self.snapshot_file = os.path.join(directory, SNAPSHOT_FILE)
+        self.pending_records = 0
+        self.skipped_records = 0  # 重放时因不完整或无法应用而跳过的记录数
+        self._file = None
+        self._segment = None
+        self._lock = threading.Lock()
+        self._compacting = None  # 正在写快照的线程
+        self.compaction_error = None  # 上一次写快照失败的异常，旧日志段保留，不丢失数据
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment_file(self, segment):
+        return os.path.join(self.directory, f"journal-{segment:06d}.jsonl")
+
+    def _segments(self):
+        """目录中的日志段编号，从小到大"""
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, "journal-*.jsonl")):
+            match = SEGMENT_PATTERN.search(path)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def recover(self):
+        """读取快照并重放之后的日志，返回恢复的状态；没有任何记录时返回None
+
+        恢复后新的记录写入新的一段，不接在可能不完整的最后一行之后。
+        """
+        state = None
+        first_segment = 1
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            first_segment = data.get("journal_segment", 1)
+            state = parse_schedule_data(data)
+            state["week_range"] = list(state["week_range"])
+
+        segments = [segment for segment in self._segments() if segment >= first_segment]
+        self.pending_records = 0
+        self.skipped_records = 0
+        for segment in segments:
+            with open(self._segment_file(segment), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 崩溃时只写了一半的记录
+                        self.skipped_records += 1
+                        continue
+                    if state is None:
+                        state = {"elective_courses": [], "selected_electives": [], "week_range": [1, 20]}
+                    try:
+                        apply_record(state, record)
+                    except (OSError, KeyError, ValueError):
+                        if record.get("op") == "load":
+                            # 导入的文件已经移动或修改，之后的记录都建立在那次导入的数据上，不能继续重放
+                            raise
+                        self.skipped_records += 1
+                        continue
+                    self.pending_records += 1
+
+        self._open_segment(max(segments + [first_segment - 1]) + 1)
+        return state
+
+    def _open_segment(self, segment):
+        if self._file is not None:
+            self._file.close()
+        self._segment = segment
+        self._file = open(self._segment_file(segment), "a", encoding="utf-8")
+
+    def append(self, op, **fields):
+        """追加一条记录并同步到磁盘"""
+        if self._file is None:
+            self.recover()
+        record = {"op": op, **fields}
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.pending_records += 1
+
+    @property
+    def needs_compaction(self):
+        return self.pending_records >= self.compact_records and not self.compacting
+
+    @property
+    def compacting(self):
+        return self._compacting is not None and self._compacting.is_alive()
+
+    def compact(self, elective_courses, selected_electives, week_range, background=True):
+        """把当前状态写为快照，之后删除旧的日志段
+
+        在界面线程中调用：先切换到新的日志段，并在本线程中把课程转换为字典（界面会就地修改课程对象，
+        后台线程不能再读取它们），之后的修改写入新段；后台线程只写出JSON并删除旧的日志段
+        （background为False时等待正在写的快照完成后直接写出）。返回写快照的线程或None。
+        """
+        if self.compacting:
+            if background:
+                return None
+            self._compacting.join()
+        if self._file is None:
+            self.recover()
+        with self._lock:
+            next_segment = self._segment + 1
+            self._open_segment(next_segment)
+            self.pending_records = 0
+        data = build_export_data(elective_courses, selected_electives, list(week_range))
+        data["journal_segment"] = next_segment
+
+        def write_snapshot():
+            try:
+                atomic_write(self.snapshot_file, lambda temp_name: write_json(temp_name, data))
+                for segment in self._segments():
+                    if segment < next_segment:
+                        os.remove(self._segment_file(segment))
+                self.compaction_error = None
+            except Exception as e:
+                self.compaction_error = e
+
+        if not background:
+            write_snapshot()
+            return None
+        self._compacting = threading.Thread(target=write_snapshot, daemon=True)
+        self._compacting.start()
+        return self._compacting
+
+    def close(self):
+        """等待正在写的快照完成并关闭日志文件"""
+        if self._compacting is not None:
+            self._compacting.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
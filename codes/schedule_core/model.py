@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""课程数据模型：星期、时间安排、按周次压缩的时间安排和课程记录"""
+
+import re
+import sys
+from enum import Enum
+
+
+class Weekday(Enum):
+    """星期枚举类型"""
+    MONDAY = 1
+    TUESDAY = 2
+    WEDNESDAY = 3
+    THURSDAY = 4
+    FRIDAY = 5
+    SATURDAY = 6
+    SUNDAY = 7
+    
+    @classmethod
+    def from_name(cls, name):
+        """从中文名称获取枚举值"""
+        return WEEKDAY_BY_NAME.get(name, cls.MONDAY)
+    
+    @classmethod
+    def from_number(cls, number):
+        """从数字获取枚举值"""
+        try:
+            num = int(number)
+            if 1 <= num <= 7:
+                return cls(num)
+            return cls.MONDAY
+        except (ValueError, TypeError):
+            return cls.MONDAY
+    
+    def to_name(self):
+        """获取中文名称"""
+        name_map = {
+            self.MONDAY: "周一",
+            self.TUESDAY: "周二",
+            self.WEDNESDAY: "周三",
+            self.THURSDAY: "周四",
+            self.FRIDAY: "周五",
+            self.SATURDAY: "周六",
+            self.SUNDAY: "周日"
+        }
+        return name_map.get(self, "周一")
+    
+    def to_column_index(self):
+        """获取在课表中的列索引（1-based）"""
+        return self.value
+
+
+# 星期名称，按Weekday的值排列
+DAY_NAMES = tuple(day.to_name() for day in Weekday)
+# 星期名称 -> Weekday
+WEEKDAY_BY_NAME = {day.to_name(): day for day in Weekday}
+
+# 相同的节次组合共用同一个元组
+_PERIOD_TUPLES = {}
+
+
+def intern_periods(periods):
+    """将节次列表转换为共享的元组"""
+    periods = tuple(periods)
+    return _PERIOD_TUPLES.setdefault(periods, periods)
+
+
+def intern_text(value):
+    """驻留教师、地点等重复出现的字符串"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ScheduleSlot:
+    """一条时间安排：某一周某一天上的若干节次
+
+    星期以Weekday保存（无法识别的名称保留原字符串），节次为共享的元组。
+    支持按键访问（schedule["day"]等），与原来的字典记录用法一致。
+    """
+    __slots__ = ("week", "weekday", "periods", "extra")
+
+    def __init__(self, week, weekday, periods, extra=None):
+        self.week = week
+        self.weekday = weekday
+        self.periods = intern_periods(periods)
+        self.extra = extra  # 其他字段（date_range、major等），没有时为None
+
+    @classmethod
+    def from_dict(cls, data):
+        """由JSON中的字典创建时间安排"""
+        if isinstance(data, ScheduleSlot):
+            return data
+        day = data["day"]
+        extra = {key: value for key, value in data.items() if key not in ("week", "day", "periods")}
+        return cls(data["week"], WEEKDAY_BY_NAME.get(day, intern_text(day)), data["periods"],
+                   extra or None)
+
+    @property
+    def day(self):
+        """星期的中文名称"""
+        if isinstance(self.weekday, Weekday):
+            return DAY_NAMES[self.weekday.value - 1]
+        return self.weekday
+
+    def to_dict(self):
+        """转换为可写入JSON的字典"""
+        data = {"week": self.week, "day": self.day, "periods": list(self.periods)}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key):
+        if key == "week":
+            return self.week
+        if key == "day":
+            return self.day
+        if key == "periods":
+            return self.periods
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in ("week", "day", "periods") or bool(self.extra and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"ScheduleSlot({self.to_dict()!r})"
+
+
+# 周次表达式中的一段，如 "1-16"、"1-15单"、"2-16周(双)"、"1-16 odd"、"18"
+WEEK_SEGMENT = re.compile(r"(\d+)\s*(?:[-~～—至]\s*(\d+))?\s*周?\s*[(（]?\s*(单|双|odd|even)?\s*[)）]?")
+
+
+def parse_weeks(text):
+    """将周次表达式解析为周次位图（第w周对应第w位）"""
+    mask = 0
+    for start, end, parity in WEEK_SEGMENT.findall(str(text)):
+        start = int(start)
+        end = int(end) if end else start
+        if parity in ("单", "odd"):
+            weeks = (week for week in range(start, end + 1) if week % 2 == 1)
+        elif parity in ("双", "even"):
+            weeks = (week for week in range(start, end + 1) if week % 2 == 0)
+        else:
+            weeks = range(start, end + 1)
+        for week in weeks:
+            mask |= 1 << week
+    return mask
+
+
+def format_weeks(mask):
+    """将周次位图格式化为简短的周次表达式，如 "1-15单,16-18" """
+    weeks = [week for week in range(mask.bit_length()) if mask >> week & 1]
+    parts = []
+    i = 0
+    while i < len(weeks):
+        # 连续周次的长度
+        j = i
+        while j + 1 < len(weeks) and weeks[j + 1] == weeks[j] + 1:
+            j += 1
+        # 隔周（单周或双周）的长度
+        k = i
+        while k + 1 < len(weeks) and weeks[k + 1] == weeks[k] + 2:
+            k += 1
+        
+        if k - i >= 2 and k - i > j - i:
+            parts.append(f"{weeks[i]}-{weeks[k]}{'单' if weeks[i] % 2 else '双'}")
+            i = k + 1
+        elif j > i:
+            parts.append(f"{weeks[i]}-{weeks[j]}")
+            i = j + 1
+        else:
+            parts.append(str(weeks[i]))
+            i += 1
+    return ",".join(parts)
+
+
+class WeekPattern:
+    """按周次压缩的时间安排：同一星期、同一组节次在若干周上课
+
+    周次以位图保存，展开后得到逐周的ScheduleSlot。
+    """
+    __slots__ = ("weekday", "periods", "weeks", "extra")
+
+    def __init__(self, weekday, periods, weeks, extra=None):
+        self.weekday = weekday
+        self.periods = intern_periods(periods)
+        self.weeks = weeks  # 周次位图
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """由2.0格式JSON中的字典创建"""
+        day = data["day"]
+        extra = {key: value for key, value in data.items() if key not in ("day", "periods", "weeks")}
+        return cls(WEEKDAY_BY_NAME.get(day, intern_text(day)), data["periods"],
+                   parse_weeks(data["weeks"]), extra or None)
+
+    def to_dict(self):
+        """转换为2.0格式的字典"""
+        day = DAY_NAMES[self.weekday.value - 1] if isinstance(self.weekday, Weekday) else self.weekday
+        data = {"day": day, "periods": list(self.periods), "weeks": format_weeks(self.weeks)}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def week_list(self):
+        """按从小到大返回所有周次"""
+        return [week for week in range(self.weeks.bit_length()) if self.weeks >> week & 1]
+
+
+def compress_schedule(schedule_info):
+    """将逐周的时间安排压缩为WeekPattern列表
+
+    按(星期, 节次, 其他字段)分组并合并周次；存在无法用位图表示的记录
+    （周次不是非负整数、同一周重复出现、其他字段不可哈希）时返回None。
+    记录之间的先后顺序不保存，展开时按(周次, 星期)排序。
+    """
+    groups = {}
+    for schedule in schedule_info:
+        week = schedule["week"]
+        if type(week) is not int or week < 0:
+            return None
+        if isinstance(schedule, ScheduleSlot):
+            weekday, periods, extra = schedule.weekday, schedule.periods, schedule.extra
+        else:
+            schedule = ScheduleSlot.from_dict(schedule)
+            weekday, periods, extra = schedule.weekday, schedule.periods, schedule.extra
+        try:
+            key = (weekday, periods, tuple(sorted(extra.items())) if extra else ())
+            pattern = groups.get(key)
+        except TypeError:
+            return None
+        if pattern is None:
+            pattern = groups[key] = WeekPattern(weekday, periods, 0, extra)
+        if pattern.weeks >> week & 1:
+            return None
+        pattern.weeks |= 1 << week
+    return list(groups.values())
+
+
+def expand_patterns(patterns):
+    """将WeekPattern列表展开为按(周次, 星期)排序的ScheduleSlot列表
+
+    位图不记录原来的逐周记录顺序，展开结果总是规范化为按(周次, 星期)排序；
+    1.0格式的文件迁移为2.0后再载入，schedule_info的内容不变，但顺序可能与原文件不同。
+    """
+    slots = [ScheduleSlot(week, pattern.weekday, pattern.periods, pattern.extra)
+             for pattern in patterns for week in pattern.week_list()]
+    slots.sort(key=lambda slot: (slot.week, slot.weekday.value if isinstance(slot.weekday, Weekday) else 8))
+    return slots
+
+
+class Course:
+    """一门课程（一个教学班）的记录
+
+    使用__slots__保存常用字段，周次在载入时统一转换为整数元组，时间安排为ScheduleSlot列表。
+    支持按键访问、get、in和update，与原来的字典记录用法一致；to_dict/from_dict可无损地与JSON互转，
+    唯一的例外是时间安排的顺序：压缩为WeekPattern的时间安排展开后按(周次, 星期)排序，不保留原来的顺序。
+    从2.0格式载入时只保存压缩的WeekPattern，第一次访问schedule_info时才展开。
+    """
+    FIELDS = ("id", "name", "teacher", "location", "schedule_info", "weeks", "periods")
+    __slots__ = ("id", "name", "teacher", "location", "_schedule_info", "_patterns",
+                 "weeks", "periods", "extra")
+
+    def __init__(self, id=None, name=None, teacher=None, location=None, schedule_info=None,
+                 weeks=None, periods=None, extra=None):
+        self.id = id
+        self.name = intern_text(name)
+        self.teacher = intern_text(teacher)
+        self.location = intern_text(location)
+        self._schedule_info = schedule_info
+        self._patterns = None  # 压缩的时间安排，None表示尚未压缩
+        self.weeks = weeks
+        self.periods = periods
+        self.extra = extra  # 其他字段及无法规范化的原始值，没有时为None
+
+    @classmethod
+    def from_dict(cls, data):
+        """由JSON中的字典创建课程，缺失的字段保持缺失"""
+        if isinstance(data, Course):
+            return data
+        course = cls()
+        for key, value in data.items():
+            if key == "slots":
+                # 2.0格式的压缩时间安排
+                course.patterns = [WeekPattern.from_dict(pattern) for pattern in value]
+            else:
+                course[key] = value
+        return course
+
+    @property
+    def schedule_info(self):
+        """逐周的时间安排，从压缩格式载入时在第一次访问时展开"""
+        if self._schedule_info is None and self._patterns is not None:
+            self._schedule_info = expand_patterns(self._patterns)
+        return self._schedule_info
+
+    @schedule_info.setter
+    def schedule_info(self, value):
+        self._schedule_info = value
+        self._patterns = None
+
+    @property
+    def patterns(self):
+        """压缩的时间安排（WeekPattern列表），无法无损压缩时为None（记录的顺序不算在内，见expand_patterns）"""
+        if self._patterns is None and self._schedule_info is not None:
+            self._patterns = compress_schedule(self._schedule_info)
+        return self._patterns
+
+    @patterns.setter
+    def patterns(self, value):
+        self._patterns = value
+        self._schedule_info = None
+
+    def pending_patterns(self):
+        """时间安排尚未展开时返回压缩的WeekPattern列表，否则返回None"""
+        return self._patterns if self._schedule_info is None else None
+
+    def to_dict(self, compact=False):
+        """转换为可写入JSON的字典；compact为True时时间安排写为2.0格式的slots"""
+        data = {}
+        patterns = self.patterns if compact else None
+        for key in self.FIELDS:
+            if key == "schedule_info" and patterns is not None:
+                data["slots"] = [pattern.to_dict() for pattern in patterns]
+                continue
+            value = getattr(self, key)
+            if value is None:
+                continue
+            if key == "schedule_info":
+                value = [schedule.to_dict() for schedule in value]
+            elif isinstance(value, tuple):
+                value = list(value)
+            data[key] = value
+        if self.extra:
+            # 原始值覆盖规范化后的值，保证写回的内容与读入时一致
+            data.update(self.extra)
+        return data
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS or value is None:
+            if key in self.FIELDS:
+                setattr(self, key, None)
+            self._set_extra(key, value)
+            return
+        
+        raw = None
+        if key == "schedule_info":
+            value = [ScheduleSlot.from_dict(schedule) for schedule in value]
+        elif key == "weeks":
+            # 周次统一为整数元组，原始写法不同时另外保留
+            try:
+                if isinstance(value, (list, tuple)):
+                    weeks = tuple(int(week) for week in value)
+                else:
+                    weeks = (int(value),)
+            except (ValueError, TypeError):
+                setattr(self, key, None)
+                self._set_extra(key, value)
+                return
+            if list(weeks) != value and weeks != value:
+                raw = value
+            value = weeks
+        elif key == "periods":
+            if not isinstance(value, (list, tuple)):
+                raw = value
+                value = (value,)
+            value = intern_periods(value)
+        elif key in ("name", "teacher", "location"):
+            value = intern_text(value)
+        setattr(self, key, value)
+        
+        if raw is not None:
+            self._set_extra(key, raw)
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+
+    def _set_extra(self, key, value):
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __contains__(self, key):
+        if key == "schedule_info":
+            # 不触发展开
+            if self._schedule_info is not None or self._patterns is not None:
+                return True
+        elif key in self.FIELDS and getattr(self, key) is not None:
+            return True
+        return bool(self.extra and key in self.extra)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return [key for key in dict.fromkeys(self.FIELDS + tuple(self.extra or ())) if key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def update(self, other):
+        """按键批量更新字段"""
+        for key, value in other.items():
+            self[key] = value
+
+    def __repr__(self):
+        return f"Course({self.to_dict()!r})"
+
+
+# 导出文件格式版本：2.0起时间安排按周次压缩保存在slots中，1.0为逐周的schedule_info
+EXPORT_VERSION = "2.0"
+
+
+def model_to_json(value):
+    """json.dump的default钩子，将Course和ScheduleSlot转换为字典"""
+    if isinstance(value, (Course, ScheduleSlot)):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""选课方案优化：按评分目标求最好的K个无冲突方案
+
+目标函数可以替换和组合，每个目标给出方案的代价（越小越好）和部分方案的代价下界。
+下界是可容许的（不会高于任何补全后的代价），分支定界时下界已不优于第K好的方案的
+分支直接剪掉。代价按占用位图计算：位图中每个(周次, 星期)占PERIOD_BITS位，
+按天的统计用整数位运算一次算完，不逐天循环。
+"""
+
+import bisect
+
+from .conflict import PERIOD_BITS
+from .solver import ScheduleSolver
+
+
+def popcount(value):
+    """整数中1的个数"""
+    return bin(value).count("1")
+
+
+class CellMasks:
+    """占用位图的按天掩码：第i个(周次, 星期)占第1+i*PERIOD_BITS起的PERIOD_BITS位"""
+
+    def __init__(self, cell_count):
+        self.cell_count = cell_count
+        self.first = sum(1 << (1 + cell * PERIOD_BITS) for cell in range(cell_count))  # 每天第1节的位
+        # 每天第s节及以后、第PERIOD_BITS-s节及以前的位，用于天内移位不越界
+        shifts = [1 << step for step in range((PERIOD_BITS - 1).bit_length())]
+        self.up = [(shift, self.periods(range(shift + 1, PERIOD_BITS + 1))) for shift in shifts]
+        self.down = [(shift, self.periods(range(1, PERIOD_BITS - shift + 1))) for shift in shifts]
+
+    @classmethod
+    def for_masks(cls, masks):
+        """能容纳给定位图的掩码"""
+        bits = max((mask.bit_length() for mask in masks), default=1)
+        return cls(max(1, (bits - 1 + PERIOD_BITS - 1) // PERIOD_BITS))
+
+    def periods(self, periods):
+        """每天指定节次的位"""
+        mask = 0
+        for period in periods:
+            mask |= self.first << (period - 1)
+        return mask
+
+    def days(self, occupied):
+        """有课的(周次, 星期)：每天折叠到该天第1节的位"""
+        shift = 1
+        while shift < PERIOD_BITS:
+            occupied |= occupied >> shift
+            shift <<= 1
+        return occupied & self.first
+
+    def gaps(self, occupied):
+        """每天第一节课和最后一节课之间的空节"""
+        upward = downward = occupied
+        for shift, mask in self.up:
+            upward |= (upward << shift) & mask
+        for shift, mask in self.down:
+            downward |= (downward >> shift) & mask
+        return upward & downward & ~occupied
+
+
+class Objective:
+    """评分目标：代价越小越好
+
+    子类实现cost；代价随占用增加不会减少时可以使用默认的下界，否则需要覆盖bound。
+    """
+    label = ""
+
+    def __init__(self, weight=1):
+        self.weight = weight
+        self.cells = None
+
+    def prepare(self, cells):
+        """搜索开始前调用，cells为CellMasks"""
+        self.cells = cells
+
+    def cost(self, occupied):
+        raise NotImplementedError
+
+    def bound(self, occupied, candidates):
+        """部分方案的代价下界；candidates为每门未选课程的候选位图列表
+
+        默认假设代价单调：补全后的代价至少是当前代价加上任一门未选课程的最小增量。
+        """
+        current = self.cost(occupied)
+        increase = 0
+        for masks in candidates:
+            increase = max(increase, min(self.cost(occupied | mask) for mask in masks) - current)
+        return current + increase
+
+
+class EarlyClassObjective(Objective):
+    """早课最少：统计第1、2节有课的天数"""
+    label = "早课最少"
+
+    def __init__(self, weight=1, periods=(1, 2)):
+        super().__init__(weight)
+        self.early_periods = tuple(periods)
+        self.early = 0
+
+    def prepare(self, cells):
+        super().prepare(cells)
+        self.early = cells.periods(self.early_periods)
+
+    def cost(self, occupied):
+        return popcount(self.cells.days(occupied & self.early))
+
+
+class StudyDaysObjective(Objective):
+    """空闲天数最多：统计整个学期有课的天数"""
+    label = "空闲天数最多"
+
+    def cost(self, occupied):
+        return popcount(self.cells.days(occupied))
+
+
+class IdleGapObjective(Objective):
+    """课间空档最少：统计每天第一节课和最后一节课之间的空节数"""
+    label = "课间空档最少"
+
+    def cost(self, occupied):
+        return popcount(self.cells.gaps(occupied))
+
+    def bound(self, occupied, candidates):
+        # 空档可能被后选的课程填上，代价不单调；
+        # 当前的空节如果没有任何候选能占用，补全后仍然是空节
+        coverable = 0
+        for masks in candidates:
+            for mask in masks:
+                coverable |= mask
+        return popcount(self.cells.gaps(occupied) & ~coverable)
+
+
+# 界面中可选的评分目标
+OBJECTIVES = (EarlyClassObjective, StudyDaysObjective, IdleGapObjective)
+
+
+class ScheduleOptimizer(ScheduleSolver):
+    """按评分目标求最好的K个无冲突选课方案（分支定界）
+
+    objectives为Objective列表，方案的评分为各目标代价的加权和（包括fixed中的课程）。
+    评分相同的方案默认按找到的先后取舍；exact_ties为True时按(评分, 教学班下标)排序，
+    结果与搜索顺序无关（剪枝相应放宽），供并行搜索合并各分支的结果。
+    shared_threshold为外部已知的第K好评分（如其他进程找到的方案），评分下界超过它的分支被剪掉。
+    """
+    TICK_NODES = 2048  # run()每访问这么多个节点交还一次控制权
+
+    def __init__(self, courses, names, objectives, fixed=()):
+        self.objectives = list(objectives)
+        self.best = []  # [(评分, 找到的顺序, 教学班下标元组), ...]，按评分排列
+        self.limit = 1
+        self._found = 0
+        self.exact_ties = False
+        self.shared_threshold = None
+        super().__init__(courses, names, fixed)
+
+    def load_bitmaps(self, domains, fixed_mask):
+        super().load_bitmaps(domains, fixed_mask)
+        masks = [mask for domain in domains for mask, _ in domain]
+        cells = CellMasks.for_masks(masks + [fixed_mask])
+        for objective in self.objectives:
+            objective.prepare(cells)
+
+    def score(self, occupied):
+        """方案的评分"""
+        return sum(objective.weight * objective.cost(occupied) for objective in self.objectives)
+
+    def lower_bound(self, occupied, domains):
+        """部分方案的评分下界"""
+        candidates = [[mask for mask, _ in domain] for _, domain in domains]
+        return sum(objective.weight * objective.bound(occupied, candidates) for objective in self.objectives)
+
+    def run(self, k=1, should_stop=None, assignment=()):
+        """分支定界搜索，过程中定期生成None以便界面处理事件；结束后用results()取结果
+
+        assignment为预先选定的 [(课程下标, 教学班下标), ...]，用于只搜索其中一个分支。
+        """
+        self.best = []
+        self.limit = k
+        self._found = 0
+        if not self.names:
+            return
+        state = self.restrict(assignment)
+        if state is None:
+            return
+        domains, occupied, choice = state
+        yield from self._optimize(domains, occupied, choice, should_stop)
+
+    def top(self, k=1, should_stop=None):
+        """返回最好的k个方案 [(评分, [教学班, ...]), ...]"""
+        for _ in self.run(k, should_stop):
+            pass
+        return self.results()
+
+    def results(self):
+        """当前最好的方案 [(评分, [教学班, ...]), ...]，按评分从小到大"""
+        return [(score, self.courses_for(choice)) for score, _, choice in self.best]
+
+    def _threshold(self):
+        """剪枝阈值：已有k个方案时为第k好的评分"""
+        return self.best[-1][0] if len(self.best) >= self.limit else None
+
+    def _optimize(self, domains, occupied, choice, should_stop):
+        self.nodes += 1
+        if self.nodes % self.TICK_NODES == 0:
+            yield
+            if should_stop is not None and should_stop():
+                return
+        if not domains:
+            self._record(self.score(occupied), tuple(choice))
+            return
+
+        threshold = self._threshold()
+        if threshold is not None or self.shared_threshold is not None:
+            bound = self.lower_bound(occupied, domains)
+            if threshold is not None and (bound > threshold or bound == threshold and not self.exact_ties):
+                return
+            if self.shared_threshold is not None and bound > self.shared_threshold:
+                return
+
+        # 剩余候选最少的课程优先，候选按加入后的评分从好到差尝试
+        position = min(range(len(domains)), key=lambda i: len(domains[i][1]))
+        course_index, domain = domains[position]
+        rest = domains[:position] + domains[position + 1:]
+        ordered = sorted(domain, key=lambda item: self.score(occupied | item[0]))
+        for mask, section_index in ordered:
+            filtered = []
+            for other_index, other_domain in rest:
+                remaining = [item for item in other_domain if not item[0] & mask]
+                if not remaining:
+                    break
+                filtered.append((other_index, remaining))
+            else:
+                choice[course_index] = section_index
+                yield from self._optimize(filtered, occupied | mask, choice, should_stop)
+        choice[course_index] = None
+
+    def _record(self, score, choice):
+        if self.exact_ties:
+            entry = (score, 0, choice)
+            if len(self.best) >= self.limit and entry >= self.best[-1]:
+                return
+        else:
+            threshold = self._threshold()
+            if threshold is not None and score >= threshold:
+                return
+            self._found += 1
+            entry = (score, self._found, choice)
+        bisect.insort(self.best, entry)
+        del self.best[self.limit:]
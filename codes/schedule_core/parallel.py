@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""并行选课搜索：把搜索树的顶层分支分给进程池
+
+主进程编译好候选位图后按顺序搜索的访问顺序展开顶层若干层，得到一组互不相交的分支；
+位图在子进程启动时传入一次（只读），之后每个任务只传分支上预先选定的教学班下标。
+各分支的结果按固定规则合并，与任务完成的先后无关：
+枚举方案时按分支顺序拼接（与顺序搜索的结果顺序相同），求最好的K个方案时
+按(评分, 教学班下标)排序。求最好的方案时各进程通过共享的阈值交换已找到的第K好评分，
+只剪掉严格更差的分支，不影响合并结果。取消时设置共享的标志，子进程定期检查后尽快结束当前分支。
+"""
+
+import concurrent.futures
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+
+from .optimizer import ScheduleOptimizer
+from .solver import ScheduleSolver
+
+# 子进程中的搜索器、取消标志和共享阈值，由_init_worker设置
+_worker = {}
+
+OPTIMIZE_TICK_NODES = 256  # 子进程中交换阈值、检查取消标志的间隔
+
+
+def _init_worker(names, domains, fixed_mask, objectives, cancel_event, shared_threshold):
+    if objectives is None:
+        solver = ScheduleSolver([], names)
+    else:
+        solver = ScheduleOptimizer([], names, objectives)
+        solver.exact_ties = True
+        solver.TICK_NODES = OPTIMIZE_TICK_NODES
+    solver.load_bitmaps(domains, fixed_mask)
+    _worker["solver"] = solver
+    _worker["cancel"] = cancel_event
+    _worker["threshold"] = shared_threshold
+
+
+def _should_stop(interval=1024):
+    """每调用interval次检查一次取消标志"""
+    cancel_event = _worker["cancel"]
+    counter = itertools.count(1)
+    return lambda: next(counter) % interval == 0 and cancel_event.is_set()
+
+
+def _search_branch(assignment, limit):
+    """在子进程中枚举一个分支的方案，返回教学班下标元组列表"""
+    solver = _worker["solver"]
+    return list(itertools.islice(solver.search(assignment, _should_stop()), limit))
+
+
+def _exchange_threshold(optimizer, k):
+    """发布本进程的第k好评分，并取回所有进程中最好的阈值"""
+    shared = _worker["threshold"]
+    with shared.get_lock():
+        if len(optimizer.best) >= k and optimizer.best[-1][0] < shared.value:
+            shared.value = optimizer.best[-1][0]
+        value = shared.value
+    if value != math.inf:
+        optimizer.shared_threshold = value
+
+
+def _optimize_branch(assignment, k):
+    """在子进程中求一个分支最好的k个方案，返回 [(评分, 教学班下标元组), ...]"""
+    optimizer = _worker["solver"]
+    cancel_event = _worker["cancel"]
+
+    def should_stop():
+        _exchange_threshold(optimizer, k)
+        return cancel_event.is_set()
+
+    _exchange_threshold(optimizer, k)
+    for _ in optimizer.run(k, should_stop, assignment):
+        pass
+    _exchange_threshold(optimizer, k)
+    return [(score, choice) for score, _, choice in optimizer.best]
+
+
+class ParallelScheduleSearch:
+    """用进程池并行搜索选课方案
+
+    objectives为None时枚举无冲突方案（同ScheduleSolver），否则求评分最好的方案（同ScheduleOptimizer）。
+    start_search/start_optimize提交任务后立即返回，界面可以定期调用progress、collect_solutions、
+    best查看进度和结果，调用cancel取消；solve/top为阻塞的用法。
+    branch_count为顶层分支的目标个数，应为进程数的数倍，使各进程的负载大致均衡。
+    """
+
+    def __init__(self, courses, names, fixed=(), objectives=None, workers=None, branch_count=64):
+        if objectives is None:
+            self.solver = ScheduleSolver(courses, names, fixed)
+        else:
+            self.solver = ScheduleOptimizer(courses, names, objectives, fixed)
+        self.objectives = objectives
+        self.missing = self.solver.missing
+        self.workers = workers or os.cpu_count() or 1
+        # 分支数与进程数无关，保证不同机器上的结果相同
+        self.branches = self.split(branch_count)
+        self.limit = None
+        self._executor = None
+        self._cancel_event = None
+        self._threshold = None  # 各进程共享的第K好评分
+        self._futures = []
+        self._collected = 0  # 已经由collect_solutions取走结果的分支数
+        self._yielded = 0  # 已经取走的方案数
+
+    def split(self, target):
+        """按顺序搜索的访问顺序逐层展开顶层分支，直到分支数不少于target或无法再展开"""
+        frontier = [()]
+        while frontier and len(frontier) < target:
+            expanded = []
+            for assignment in frontier:
+                expanded.extend(self.solver.branches(assignment))
+            if expanded == frontier:  # 都已经是完整方案
+                break
+            frontier = expanded
+        return frontier
+
+    def _start(self, function, argument):
+        self.cancel()
+        self._cancel_event = multiprocessing.Event()
+        self._threshold = multiprocessing.Value("d", math.inf)
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.solver.names, self.solver.domains, self.solver.fixed_mask,
+                      self.objectives, self._cancel_event, self._threshold),
+        )
+        self._futures = [self._executor.submit(function, assignment, argument) for assignment in self.branches]
+        self._collected = 0
+        self._yielded = 0
+
+    def start_search(self, limit=None):
+        """开始枚举无冲突方案，最多limit个"""
+        self.limit = limit
+        self._start(_search_branch, limit)
+
+    def start_optimize(self, k=1):
+        """开始求评分最好的k个方案"""
+        self.limit = k
+        self._start(_optimize_branch, k)
+
+    def progress(self):
+        """(已完成的分支数, 分支总数)"""
+        return sum(future.done() for future in self._futures), len(self._futures)
+
+    def done(self):
+        return all(future.done() for future in self._futures)
+
+    def collect_solutions(self):
+        """取走按分支顺序已经可以确定的新方案（前面的分支都已完成），每个方案为教学班列表"""
+        solutions = []
+        while self._collected < len(self._futures) and self._futures[self._collected].done():
+            if self._futures[self._collected].cancelled():
+                break
+            for choice in self._futures[self._collected].result():
+                if self.limit is not None and self._yielded >= self.limit:
+                    break
+                solutions.append(self.solver.courses_for(choice))
+                self._yielded += 1
+            self._collected += 1
+        return solutions
+
+    def best(self):
+        """已完成的分支中最好的方案 [(评分, [教学班, ...]), ...]，按(评分, 教学班下标)排序"""
+        ranked = []
+        for future in self._futures:
+            if future.done() and not future.cancelled():
+                ranked.extend(future.result())
+        return [(score, self.solver.courses_for(choice))
+                for score, choice in heapq.nsmallest(self.limit or 1, ranked)]
+
+    def cancel(self):
+        """取消搜索：未开始的分支直接取消，正在搜索的分支尽快结束"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        """等待子进程退出"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.cancel()
+        self.close()
+
+    def solve(self, limit=None):
+        """阻塞地枚举方案，按顺序搜索的顺序逐个生成"""
+        self.start_search(limit)
+        for future in self._futures:
+            concurrent.futures.wait([future])
+            yield from self.collect_solutions()
+
+    def top(self, k=1):
+        """阻塞地求评分最好的k个方案"""
+        self.start_optimize(k)
+        concurrent.futures.wait(self._futures)
+        return self.best()
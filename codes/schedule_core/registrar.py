@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""批量导入教务系统导出的课表（Excel/CSV）
+
+教务系统导出的表格每行是一个教学班的一次上课安排，例如：
+
+    课程名称 | 教师 | 上课地点 | 星期 | 节次 | 周次
+    高等数学 | 张三 | 教一101  | 星期一 | 1-2节 | 1-16周(单)
+
+星期、节次和周次列用pandas的向量化字符串操作解析为位图，大文件按块读取。
+同一教学班的各行合并为一条Course记录：有教学班号列时按教学班号分组，否则按课程名称和教师分组，
+同一教学班在不同时间使用的地点保存在各条时间安排中。时间安排保存为压缩的WeekPattern，
+可直接加入elective_courses。
+"""
+
+import csv
+import itertools
+import os
+import re
+
+from .model import WEEK_SEGMENT, Course, WeekPattern, Weekday, intern_periods, parse_weeks
+
+# 表头别名：规范列名 -> 教务系统导出中可能出现的列名
+COLUMN_ALIASES = {
+    "name": ("课程名称", "课程名", "课程"),
+    "teacher": ("教师", "任课教师", "授课教师", "教师姓名"),
+    "location": ("上课地点", "地点", "教室", "教室地点"),
+    "day": ("星期", "上课星期", "星期几"),
+    "periods": ("节次", "上课节次"),
+    "weeks": ("周次", "上课周次", "起止周"),
+    "section": ("教学班", "教学班号", "教学班代码", "课堂号", "选课课号"),
+}
+REQUIRED_COLUMNS = ("name", "day", "periods", "weeks")
+
+# 节次区间，如"1-2节"、"第3,4节"、"5~6"
+PERIOD_SEGMENT = r"(\d+)\s*(?:[-~～—至]\s*(\d+))?"
+# 星期列中的星期字符，如"星期一"、"周一"、"一"、"1"
+DAY_CHARS = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "日": 7, "天": 7,
+             "1": 1, "2": 2, "3": 3, "4": 4, "5": 5, "6": 6, "7": 7}
+
+MAX_MASK_BIT = 62  # 向量化计算使用64位无符号整数
+ODD_WEEKS = sum(1 << week for week in range(1, MAX_MASK_BIT + 1, 2))
+EVEN_WEEKS = sum(1 << week for week in range(2, MAX_MASK_BIT + 1, 2))
+
+EXTENSIONS = (".xlsx", ".xlsm", ".xls", ".csv")
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def is_registrar_file(filename):
+    """是否为可批量导入的表格文件"""
+    return filename.lower().endswith(EXTENSIONS)
+
+
+def _parse_periods(text):
+    """逐行解析节次表达式为位图，用于超出64位范围的行"""
+    mask = 0
+    for match in re.finditer(PERIOD_SEGMENT, text):
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        if start <= end:
+            mask |= (1 << (end + 1)) - (1 << start)
+    return mask
+
+
+def _range_masks(text, pattern, parse):
+    """向量化地将表达式列解析为位图，返回与text索引对齐的Series（Python整数，无法解析为0）
+
+    pattern的前两组为区间的起止，可选的第三组为单双周；按区间计算位图后对同一行按位或。
+    超出64位范围的行逐行用parse（与pattern对应的解析函数）计算。
+    """
+    import numpy as np
+    import pandas as pd
+
+    matches = text.str.extractall(pattern)
+    result = pd.Series(0, index=text.index, dtype=object)
+    if matches.empty:
+        return result
+    starts = matches[0].astype(np.int64).to_numpy()
+    ends = matches[1].fillna(matches[0]).astype(np.int64).to_numpy()
+    overflow = ends > MAX_MASK_BIT
+    valid = (starts <= ends) & ~overflow
+
+    one = np.uint64(1)
+    safe_starts = np.where(valid, starts, 0).astype(np.uint64)
+    safe_ends = np.where(valid, ends, 0).astype(np.uint64)
+    masks = (one << (safe_ends + one)) - (one << safe_starts)
+    if matches.shape[1] > 2:
+        parity = matches[2].fillna("").to_numpy()
+        masks = np.where(np.isin(parity, ("单", "odd")), masks & np.uint64(ODD_WEEKS), masks)
+        masks = np.where(np.isin(parity, ("双", "even")), masks & np.uint64(EVEN_WEEKS), masks)
+    masks = np.where(valid, masks, np.uint64(0))
+
+    # extractall的结果按原始行排列，用reduceat对每行的所有区间按位或
+    rows = matches.index.get_level_values(0).to_numpy()
+    firsts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    combined = np.bitwise_or.reduceat(masks, firsts)
+    result[rows[firsts]] = [int(mask) for mask in combined]
+
+    for row in np.unique(rows[overflow]):
+        result[row] = parse(text[row])
+    return result
+
+
+def parse_registrar_frame(frame):
+    """向量化解析已按COLUMN_ALIASES重命名的表格块
+
+    返回新的DataFrame，包含name/teacher/location/section/weekday/periods/weeks列，
+    weekday为1-7，periods和weeks为位图；无法解析的行weekday、periods或weeks为0。
+    """
+    import pandas as pd
+
+    text = {column: frame[column].fillna("").astype(str).str.strip()
+            for column in frame.columns if column in COLUMN_ALIASES}
+    result = pd.DataFrame(index=frame.index)
+    result["name"] = text["name"]
+    result["teacher"] = text["teacher"] if "teacher" in text else ""
+    result["location"] = text["location"] if "location" in text else ""
+    result["section"] = text["section"] if "section" in text else ""
+
+    # 星期：取"星期"/"周"后面的字符，没有前缀时取第一个星期字符
+    day_chars = text["day"].str.extract(r"(?:星期|周)?([一二三四五六日天1-7])", expand=False)
+    result["weekday"] = day_chars.map(DAY_CHARS).fillna(0).astype(int)
+
+    result["periods"] = _range_masks(text["periods"], PERIOD_SEGMENT, _parse_periods)
+    result["weeks"] = _range_masks(text["weeks"], WEEK_SEGMENT.pattern, parse_weeks)
+    return result
+
+
+def _normalize_columns(columns):
+    """教务系统表头 -> 规范列名；缺少必需列时抛出ValueError"""
+    mapping = {}
+    for column in columns:
+        header = str(column).strip()
+        for key, aliases in COLUMN_ALIASES.items():
+            if header in aliases and key not in mapping.values():
+                mapping[column] = key
+                break
+    missing = [COLUMN_ALIASES[key][0] for key in REQUIRED_COLUMNS if key not in mapping.values()]
+    if missing:
+        raise ValueError(f"表格缺少必需的列：{'、'.join(missing)}")
+    return mapping
+
+
+def _find_header_row(rows, limit=10):
+    """在前几行中查找表头所在行（教务系统导出的第一行常为标题）"""
+    names = COLUMN_ALIASES["name"]
+    for index, row in enumerate(rows[:limit]):
+        if any(str(value).strip() in names for value in row if value is not None):
+            return index
+    return 0
+
+
+def iter_registrar_chunks(filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按块读取表格，生成(块的第一行在文件中的行号, 已重命名列的DataFrame)"""
+    import pandas as pd
+
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        head = None
+        for encoding in ("utf-8-sig", "gb18030"):
+            try:
+                with open(filename, encoding=encoding, newline="") as file:
+                    head = list(itertools.islice(csv.reader(file), 10))
+                break
+            except UnicodeDecodeError:
+                continue
+        if head is None:
+            raise ValueError("无法识别CSV文件的编码")
+        header_row = _find_header_row(head)
+        reader = pd.read_csv(filename, skiprows=header_row, dtype=str, encoding=encoding,
+                             chunksize=chunk_size)
+        line = header_row + 2
+        mapping = None
+        for chunk in reader:
+            if mapping is None:
+                mapping = _normalize_columns(chunk.columns)
+            yield line, chunk[list(mapping)].rename(columns=mapping)
+            line += len(chunk)
+    elif extension in (".xlsx", ".xlsm"):
+        # openpyxl只读模式逐行读取，不把整个工作簿载入内存
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(filename, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            head = []
+            for row in rows:
+                head.append(row)
+                if len(head) >= 10:
+                    break
+            header_row = _find_header_row(head)
+            header = head[header_row]
+            mapping = _normalize_columns(header)
+            positions = [index for index, column in enumerate(header) if column in mapping]
+            columns = [mapping[header[index]] for index in positions]
+
+            def chunks():
+                buffer = head[header_row + 1:]
+                for row in rows:
+                    buffer.append(row)
+                    if len(buffer) >= chunk_size:
+                        yield buffer
+                        buffer = []
+                if buffer:
+                    yield buffer
+
+            line = header_row + 2
+            for buffer in chunks():
+                data = [[row[index] if index < len(row) else None for index in positions] for row in buffer]
+                yield line, pd.DataFrame(data, columns=columns)
+                line += len(buffer)
+        finally:
+            workbook.close()
+    elif extension == ".xls":
+        # 旧版Excel格式需要xlrd，openpyxl只能读取.xlsx
+        try:
+            frame = pd.read_excel(filename, header=None, dtype=str)
+        except ImportError as e:
+            raise ImportError("读取.xls文件需要安装xlrd，或在Excel中另存为.xlsx后导入") from e
+        header_row = _find_header_row(frame.values.tolist())
+        frame.columns = frame.iloc[header_row]
+        frame = frame.iloc[header_row + 1:].reset_index(drop=True)
+        mapping = _normalize_columns(frame.columns)
+        frame = frame[list(mapping)].rename(columns=mapping)
+        for start in range(0, len(frame), chunk_size):
+            yield header_row + 2 + start, frame.iloc[start:start + chunk_size]
+    else:
+        raise ValueError(f"不支持的文件类型：{extension}")
+
+
+def _mask_bits(mask):
+    return [bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+
+def read_registrar_file(filename, start_id=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """读取教务系统导出的课表，返回(课程列表, 跳过的行号列表)
+
+    同一教学班的各行合并为一条课程记录（有教学班号时按教学班号，否则按课程名称和教师），
+    id从start_id开始依次分配。一个教学班在多个地点上课时，课程的地点为各地点的列表，
+    每条时间安排的extra中保存该时间的地点。缺少课程名称或星期、节次、周次无法解析的行被跳过。
+    """
+    sections = {}  # (名称, 教学班号)或(名称, 教师, None) -> (名称, 教师, {(weekday, periods, 地点): 周次位图})
+    skipped = []
+    period_tuples = {}  # 节次位图 -> 节次元组
+
+    for first_line, chunk in iter_registrar_chunks(filename, chunk_size):
+        parsed = parse_registrar_frame(chunk.reset_index(drop=True))
+        valid = ((parsed["name"] != "") & (parsed["weekday"] > 0)
+                 & (parsed["periods"] != 0) & (parsed["weeks"] != 0))
+        skipped.extend((parsed.index[~valid] + first_line).tolist())
+        parsed = parsed[valid]
+        for name, teacher, location, section, weekday, periods, weeks in zip(
+                parsed["name"], parsed["teacher"], parsed["location"], parsed["section"],
+                parsed["weekday"], parsed["periods"], parsed["weeks"]):
+            # 教学班号可能只在同一课程内唯一，与课程名称一起作为键
+            section_key = (name, section) if section else (name, teacher, None)
+            group = sections.get(section_key)
+            if group is None:
+                group = sections[section_key] = (name, teacher, {})
+            slots = group[2]
+            key = (weekday, periods, location)
+            slots[key] = slots.get(key, 0) | weeks
+
+    courses = []
+    for course_id, (name, teacher, slots) in enumerate(sections.values(), start=start_id):
+        locations = list(dict.fromkeys(location for _, _, location in slots if location))
+        course = Course(id=course_id, name=name, teacher=teacher or "未知教师",
+                        location=", ".join(locations) or "未知地点")
+        patterns = []
+        all_weeks = 0
+        all_periods = 0
+        for (weekday, period_mask, location), weeks in slots.items():
+            periods = period_tuples.get(period_mask)
+            if periods is None:
+                periods = period_tuples[period_mask] = intern_periods(_mask_bits(period_mask))
+            # 只有一个地点时与课程的地点相同，不必在每条时间安排中重复
+            extra = {"location": location} if len(locations) > 1 and location else None
+            patterns.append(WeekPattern(Weekday(weekday), periods, weeks, extra))
+            all_weeks |= weeks
+            all_periods |= period_mask
+        course.patterns = patterns
+        course.weeks = tuple(_mask_bits(all_weeks))
+        course.periods = intern_periods(_mask_bits(all_periods))
+        courses.append(course)
+    return courses, skipped
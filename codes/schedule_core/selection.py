@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""已选课程集合及其实时占用表"""
+
+from .conflict import CourseOccupancy
+
+
+class SelectionModel:
+    """已选课程集合，实时维护 (周次, 星期, 节次) -> [课程id] 的占用表
+
+    增加、删除、替换课程只更新该课程自身占用的时间格，冲突查询只访问新课程的时间格，
+    与已选课程数量无关。课程以id区分，同一id重复加入时视为替换。
+    """
+
+    def __init__(self, courses=None):
+        self.courses = {}  # course_id -> course，保持选课顺序
+        self.occupancy = {}  # (week, day, period) -> [course_id, ...]
+        self._compiled = {}  # course_id -> CourseOccupancy（加入时的时间安排快照）
+        self._order = {}  # course_id -> 加入顺序，用于按原顺序输出冲突
+        self._names = {}  # 课程名称 -> {course_id, ...}
+        self._next_order = 0
+        self.version = 0  # 每次修改加一，供缓存判断是否失效
+        for course in courses or []:
+            self.add(course)
+
+    def __len__(self):
+        return len(self.courses)
+
+    def __iter__(self):
+        return iter(list(self.courses.values()))
+
+    def __contains__(self, course_id):
+        return course_id in self.courses
+
+    def as_list(self):
+        """按选课顺序返回已选课程列表"""
+        return list(self.courses.values())
+
+    def masks(self):
+        """按选课顺序返回 [(course, 占用位图), ...]"""
+        return [(course, self._compiled[course_id].mask) for course_id, course in self.courses.items()]
+
+    def has_name(self, name):
+        """是否已经选择了该名称的课程"""
+        return bool(self._names.get(name))
+
+    def add(self, course):
+        """加入课程并登记其占用的时间格"""
+        course_id = course["id"]
+        if course_id in self.courses:
+            self.replace(course_id, course)
+            return
+        self._order[course_id] = self._next_order
+        self._next_order += 1
+        self._insert(course_id, course)
+        self.version += 1
+
+    def remove(self, course_id):
+        """移除课程并注销其占用的时间格，返回被移除的课程"""
+        if course_id not in self.courses:
+            return None
+        course = self.courses.pop(course_id)
+        self._discard(course_id)
+        del self._order[course_id]
+        self.version += 1
+        return course
+
+    def remove_name(self, name):
+        """移除指定名称的所有课程，返回被移除的课程列表"""
+        return [self.remove(course_id) for course_id in list(self._names.get(name, ()))]
+
+    def replace(self, course_id, course):
+        """用新的课程记录替换已选课程，保留其原有的选课顺序
+
+        新记录的id与另一门已选课程相同时抛出ValueError，不覆盖那门课程的占用。
+        """
+        new_id = course["id"]
+        if new_id != course_id and new_id in self.courses:
+            raise ValueError(f"已选课程中已有id为{new_id}的课程")
+        if course_id not in self.courses:
+            self.add(course)
+            return
+        self._discard(course_id)
+        if new_id != course_id:
+            # id变化时按原位置重建顺序
+            self._order[new_id] = self._order.pop(course_id)
+            self.courses = {(new_id if key == course_id else key): value
+                            for key, value in self.courses.items()}
+        self._insert(new_id, course)
+        self.version += 1
+
+    def clear(self):
+        """清空所有已选课程"""
+        self.courses.clear()
+        self.occupancy.clear()
+        self._compiled.clear()
+        self._order.clear()
+        self._names.clear()
+        self.version += 1
+
+    def reset(self, courses):
+        """用一组课程整体替换当前选择"""
+        self.clear()
+        for course in courses:
+            self.add(course)
+
+    def conflicts(self, new_course, exclude_id=None):
+        """检查新课程与已选课程的时间冲突，返回与check_course_conflict相同格式的冲突列表"""
+        if "schedule_info" not in new_course:
+            return []
+
+        candidate_ids = set()
+        for schedule in new_course["schedule_info"]:
+            week = schedule["week"]
+            day = schedule["day"]
+            for period in schedule["periods"]:
+                candidate_ids.update(self.occupancy.get((week, day, period), ()))
+        candidate_ids.discard(exclude_id)
+        if not candidate_ids:
+            return []
+
+        candidates = [self._compiled[course_id] for course_id in sorted(candidate_ids, key=self._order.get)]
+        return CourseOccupancy(new_course).conflicts_with(candidates)
+
+    def _insert(self, course_id, course):
+        compiled = CourseOccupancy(course)
+        self.courses[course_id] = course
+        self._compiled[course_id] = compiled
+        self._names.setdefault(course["name"], set()).add(course_id)
+        for schedule, _ in compiled.slots:
+            week = schedule["week"]
+            day = schedule["day"]
+            for period in schedule["periods"]:
+                owners = self.occupancy.setdefault((week, day, period), [])
+                if course_id not in owners:
+                    owners.append(course_id)
+
+    def _discard(self, course_id):
+        compiled = self._compiled.pop(course_id)
+        names = self._names.get(compiled.course["name"])
+        if names is not None:
+            names.discard(course_id)
+            if not names:
+                del self._names[compiled.course["name"]]
+        for schedule, _ in compiled.slots:
+            week = schedule["week"]
+            day = schedule["day"]
+            for period in schedule["periods"]:
+                key = (week, day, period)
+                owners = self.occupancy.get(key)
+                if owners and course_id in owners:
+                    owners.remove(course_id)
+                    if not owners:
+                        del self.occupancy[key]
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""自动排课：从选修课目录中为心愿课程挑选互不冲突的教学班
+
+elective_courses中同名的每条记录视为该课程的一个可选教学班。每个教学班编译为
+(周次, 星期, 节次)占用位图，按"剩余可选教学班最少的课程优先"回溯搜索，
+每选定一个教学班就从其余课程的候选中剔除与之冲突的教学班（前向检查），
+某门课程没有候选时立即回溯。结果以生成器逐个给出。
+"""
+
+from .conflict import OVERFLOW_BIT, CourseOccupancy
+
+
+def section_mask(course):
+    """教学班的占用位图；无法编码的时间（溢出位）不参与排课"""
+    return CourseOccupancy(course).mask & ~OVERFLOW_BIT
+
+
+def group_sections(courses, names):
+    """按心愿课程名称收集教学班，返回 {名称: [course, ...]}，保持名称和目录中的顺序"""
+    sections = {name: [] for name in names}
+    for course in courses:
+        candidates = sections.get(course["name"])
+        if candidates is not None:
+            candidates.append(course)
+    return sections
+
+
+class ScheduleSolver:
+    """无冲突选课方案的回溯搜索
+
+    courses为选修课目录，names为心愿课程名称；fixed为必须保留的课程（如已选课程），
+    方案中的教学班不能与之冲突。missing为目录中没有教学班的心愿课程，不为空时没有方案。
+    """
+
+    def __init__(self, courses, names, fixed=()):
+        self.names = list(dict.fromkeys(names))
+        self.sections = group_sections(courses, self.names)
+        self.missing = [name for name, candidates in self.sections.items() if not candidates]
+        fixed_mask = 0
+        for course in fixed:
+            fixed_mask |= section_mask(course)
+
+        # 候选：每门课程的 [(位图, 教学班下标), ...]，预先剔除与固定课程冲突的教学班
+        masks = {}
+        domains = []
+        for name in self.names:
+            domain = []
+            for index, course in enumerate(self.sections[name]):
+                mask = masks.get(id(course))
+                if mask is None:
+                    mask = masks[id(course)] = section_mask(course)
+                if not mask & fixed_mask:
+                    domain.append((mask, index))
+            domains.append(domain)
+        self.load_bitmaps(domains, fixed_mask)
+
+    def load_bitmaps(self, domains, fixed_mask):
+        """设置搜索使用的候选位图（并行搜索的子进程直接载入主进程编译好的位图）"""
+        self.domains = domains
+        self.fixed_mask = fixed_mask
+        self.nodes = 0  # 已访问的搜索节点数
+
+    def restrict(self, assignment=()):
+        """按预先选定的教学班缩小搜索范围
+
+        assignment为 [(课程下标, 教学班下标), ...]；返回 (其余课程的候选, 占用位图, 选择)，
+        预先选定的教学班互相冲突或某门课程已没有候选时返回None。
+        """
+        occupied = self.fixed_mask
+        choice = [None] * len(self.names)
+        for course_index, section_index in assignment:
+            mask = next((mask for mask, index in self.domains[course_index] if index == section_index), None)
+            if mask is None or mask & occupied:
+                return None
+            occupied |= mask
+            choice[course_index] = section_index
+        domains = []
+        for course_index, domain in enumerate(self.domains):
+            if choice[course_index] is None:
+                remaining = [item for item in domain if not item[0] & occupied]
+                if not remaining:
+                    return None
+                domains.append((course_index, remaining))
+        return domains, occupied, choice
+
+    def branches(self, assignment=()):
+        """部分选择的下一层分支，顺序与回溯搜索的访问顺序一致
+
+        已经是完整方案时返回[assignment]，无法补全时返回空列表。
+        """
+        state = self.restrict(assignment)
+        if state is None:
+            return []
+        domains = state[0]
+        if not domains:
+            return [tuple(assignment)]
+        course_index, domain = min(domains, key=lambda item: len(item[1]))
+        return [tuple(assignment) + ((course_index, section_index),) for _, section_index in domain]
+
+    def solve(self, limit=None, should_stop=None):
+        """逐个生成方案，每个方案为按心愿顺序排列的教学班列表
+
+        limit为最多生成的方案数；should_stop为可选的无参函数，返回True时提前结束搜索。
+        """
+        if self.missing or not self.names:
+            return
+        found = 0
+        for choice in self.search(should_stop=should_stop):
+            yield self.courses_for(choice)
+            found += 1
+            if limit is not None and found >= limit:
+                return
+
+    def courses_for(self, choice):
+        """教学班下标元组 -> 按心愿顺序排列的教学班列表"""
+        return [self.sections[name][index] for name, index in zip(self.names, choice)]
+
+    def search(self, assignment=(), should_stop=None):
+        """逐个生成方案的教学班下标元组（与names对应），可从预先选定的教学班开始"""
+        state = self.restrict(assignment)
+        if state is None:
+            return
+        domains, _, choice = state
+        for _ in self._search(domains, choice, should_stop):
+            yield tuple(choice)
+
+    def _search(self, domains, choice, should_stop):
+        """回溯搜索，每找到一个方案（记录在choice中）生成一次；domains为 [(课程下标, 候选), ...]"""
+        self.nodes += 1
+        if not domains:
+            yield
+            return
+        if should_stop is not None and should_stop():
+            return
+
+        # 剩余候选最少的课程优先
+        position = min(range(len(domains)), key=lambda i: len(domains[i][1]))
+        course_index, domain = domains[position]
+        rest = domains[:position] + domains[position + 1:]
+        for mask, section_index in domain:
+            # 前向检查：剔除与该教学班冲突的候选，某门课程没有候选时剪枝
+            filtered = []
+            for other_index, other_domain in rest:
+                remaining = [item for item in other_domain if not item[0] & mask]
+                if not remaining:
+                    break
+                filtered.append((other_index, remaining))
+            else:
+                choice[course_index] = section_index
+                yield from self._search(filtered, choice, should_stop)
+        choice[course_index] = None
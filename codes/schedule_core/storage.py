@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""课表的读写：JSON文件和SQLite课程目录
+
+读写函数都可以传入progress回调progress(阶段说明, 已完成数, 总数)报告进度，供后台任务
+（background.BackgroundTask）显示进度条；回调抛出的异常（如TaskCancelled）会中止读写。
+保存时先写临时文件，完成后再替换原文件，中途出错或取消不会损坏原有的课表文件。
+"""
+
+import datetime
+import json
+import os
+import tempfile
+
+from .model import EXPORT_VERSION, Course, model_to_json
+
+PROGRESS_INTERVAL = 500  # 每处理多少门课程报告一次进度
+CHUNK_SIZE = 1 << 20  # 分块读写文件的字节数
+
+
+def _report(progress, stage, done, total):
+    if progress is not None:
+        progress(stage, done, total)
+
+
+class SQLiteCatalogStore:
+    """SQLite课程目录存储
+
+    每门课程以2.0格式的JSON完整保存（保证无损，时间安排的顺序按(周次, 星期)规范化），
+    按所在列表（选修课/已选课程）和原来的顺序读写。程序运行时课程都在内存中（CourseCatalog），
+    修改也只发生在内存中，因此不提供按周次或名称查询数据库的接口，也不建立相应的索引：
+    查询结果在修改之后会与内存中的数据不一致。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS courses (
+            course_key INTEGER PRIMARY KEY,
+            list_name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            course_id,
+            name TEXT,
+            teacher TEXT,
+            location TEXT,
+            data TEXT NOT NULL
+        );
+    """
+
+    # 索引：整体写入时先删除，写完后重建，比逐行维护索引快得多
+    INDEXES = {
+        "idx_courses_list": "courses(list_name, position)",
+    }
+    # 早期版本为按周次、名称等查询建立的表和索引，保存时删除
+    OBSOLETE_INDEXES = ("idx_slots_time", "idx_slots_course", "idx_courses_name", "idx_courses_teacher",
+                        "idx_courses_location")
+
+    ELECTIVE = "elective"
+    SELECTED = "selected"
+    EXTENSIONS = (".db", ".sqlite", ".sqlite3")  # 按SQLite目录读写的文件扩展名
+
+    @classmethod
+    def is_store_file(cls, filename):
+        """是否为SQLite目录文件"""
+        return filename.lower().endswith(cls.EXTENSIONS)
+
+    def __init__(self, path):
+        import sqlite3  # 只在使用SQLite目录时导入，不影响程序启动时间
+
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self.SCHEMA)
+        self._create_indexes()
+
+    def _create_indexes(self):
+        for index_name, target in self.INDEXES.items():
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {target}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def save(self, elective_courses, selected_electives, week_range, timestamp=None, progress=None):
+        """整体写入目录（在一个事务中替换原有内容）"""
+        with self.connection:
+            for index_name in (*self.INDEXES, *self.OBSOLETE_INDEXES):
+                self.connection.execute(f"DROP INDEX IF EXISTS {index_name}")
+            self.connection.execute("DROP TABLE IF EXISTS slots")
+            self.connection.execute("DELETE FROM courses")
+            self.connection.execute("DELETE FROM meta")
+            self._insert_courses(self.ELECTIVE, elective_courses, progress)
+            self._insert_courses(self.SELECTED, selected_electives, progress)
+            _report(progress, "建立索引", 0, 1)
+            self._create_indexes()
+            self.connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ("week_range", json.dumps(list(week_range))),
+                ("timestamp", timestamp or datetime.datetime.now().isoformat()),
+                ("export_version", EXPORT_VERSION),
+            ])
+
+    def _insert_courses(self, list_name, courses, progress=None):
+        # 自行分配course_key，用一次executemany批量写入
+        first_key = self.connection.execute("SELECT COALESCE(MAX(course_key), 0) FROM courses").fetchone()[0] + 1
+        course_rows = []
+        for position, course in enumerate(courses):
+            if position % PROGRESS_INTERVAL == 0:
+                _report(progress, "写入数据库", position, len(courses))
+            course_key = first_key + position
+            data = json.dumps(course.to_dict(compact=True), ensure_ascii=False,
+                              separators=(",", ":"), default=model_to_json)
+            course_rows.append((course_key, list_name, position, course.get("id"), course.get("name"),
+                                course.get("teacher"), course.get("location"), data))
+        
+        self.connection.executemany(
+            "INSERT INTO courses (course_key, list_name, position, course_id, name, teacher, location, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", course_rows)
+
+    def load(self, progress=None):
+        """读取全部内容，返回与JSON导入文件相同结构的字典"""
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        return {
+            "elective_courses": self._load_list(self.ELECTIVE, progress),
+            "week_range": json.loads(meta["week_range"]) if "week_range" in meta else [1, 20],
+            "selected_electives": self._load_list(self.SELECTED, progress),
+            "timestamp": meta.get("timestamp", "未知时间"),
+            "export_version": meta.get("export_version", EXPORT_VERSION),
+        }
+
+    def _load_list(self, list_name, progress=None):
+        total = None
+        if progress is not None:
+            total = self.connection.execute(
+                "SELECT COUNT(*) FROM courses WHERE list_name = ?", (list_name,)).fetchone()[0]
+        return self._courses("SELECT data FROM courses WHERE list_name = ? ORDER BY position", (list_name,),
+                             progress, total)
+
+    def _courses(self, sql, parameters, progress=None, total=None):
+        courses = []
+        for index, (data,) in enumerate(self.connection.execute(sql, parameters)):
+            if progress is not None and index % PROGRESS_INTERVAL == 0:
+                progress("读取数据库", index, total)
+            courses.append(Course.from_dict(json.loads(data)))
+        return courses
+
+
+def _convert(courses, convert, stage, progress):
+    """逐个转换课程，定期报告进度"""
+    if progress is None:
+        return [convert(course) for course in courses]
+    result = []
+    for index, course in enumerate(courses):
+        if index % PROGRESS_INTERVAL == 0:
+            progress(stage, index, len(courses))
+        result.append(convert(course))
+    return result
+
+
+def build_export_data(elective_courses, selected_electives, week_range, timestamp=None, progress=None):
+    """生成导出文件的数据 - 只导出选修课程数据，时间安排按周次压缩（2.0格式）"""
+    def to_dict(course):
+        return course.to_dict(compact=True)
+    
+    return {
+        "elective_courses": _convert(elective_courses, to_dict, "整理选修课程", progress),
+        "week_range": week_range,
+        "selected_electives": _convert(selected_electives, to_dict, "整理已选课程", progress),
+        "timestamp": timestamp or datetime.datetime.now().isoformat(),
+        "export_version": EXPORT_VERSION
+    }
+
+
+def atomic_write(filename, write):
+    """先由write(临时文件名)写入同一目录下的临时文件，成功后再用os.replace替换filename
+
+    write抛出异常（包括取消）时删除临时文件，原文件保持不变。
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    descriptor, temp_name = tempfile.mkstemp(prefix=os.path.basename(filename) + ".", suffix=".tmp", dir=directory)
+    os.close(descriptor)
+    try:
+        write(temp_name)
+        # mkstemp创建的文件只有所有者可读写，改为与原文件（或普通新文件）相同的权限
+        os.chmod(temp_name, os.stat(filename).st_mode & 0o777 if os.path.exists(filename) else 0o644)
+        os.replace(temp_name, filename)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+
+
+def write_json(filename, data, progress=None):
+    """把data写为紧凑的JSON文件（分块写入并同步到磁盘）"""
+    _report(progress, "生成JSON", 0, 1)
+    content = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=model_to_json).encode("utf-8")
+    with open(filename, "wb") as f:
+        for start in range(0, len(content), CHUNK_SIZE):
+            _report(progress, "写入文件", start, len(content))
+            f.write(content[start:start + CHUNK_SIZE])
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def save_schedule(filename, elective_courses, selected_electives, week_range, progress=None):
+    """保存课表，扩展名为.db/.sqlite/.sqlite3时写为SQLite目录，否则写为紧凑的JSON
+
+    先写入同一目录下的临时文件，全部写完后再替换原文件（atomic_write）。
+    """
+    def write(temp_name):
+        if SQLiteCatalogStore.is_store_file(filename):
+            with SQLiteCatalogStore(temp_name) as store:
+                store.save(elective_courses, selected_electives, week_range, progress=progress)
+        else:
+            export_data = build_export_data(elective_courses, selected_electives, week_range, progress=progress)
+            write_json(temp_name, export_data, progress)
+        _report(progress, "替换文件", 0, 1)
+    
+    atomic_write(filename, write)
+
+
+def parse_schedule_data(import_data, progress=None):
+    """校验导入的数据并转换为课程对象
+
+    1.0格式的逐周时间安排在载入时自动迁移，下次保存时写为2.0格式。
+    缺少选修课程数据或选修课程的id重复时抛出ValueError。
+    """
+    if "elective_courses" not in import_data:
+        raise ValueError("导入文件格式不正确，缺少选修课程数据")
+    
+    elective_courses = _convert(import_data["elective_courses"], Course.from_dict, "转换选修课程", progress)
+    seen = set()
+    for course in elective_courses:
+        course_id = course.get("id")
+        if course_id is not None:
+            if course_id in seen:
+                raise ValueError(f"导入文件格式不正确，选修课程id重复：{course_id}")
+            seen.add(course_id)
+    
+    return {
+        "elective_courses": elective_courses,
+        "week_range": import_data.get("week_range", (1, 20)),
+        "selected_electives": _convert(import_data.get("selected_electives", []), Course.from_dict,
+                                       "转换已选课程", progress),
+        "timestamp": import_data.get("timestamp", "未知时间"),
+    }
+
+
+def load_schedule(filename, progress=None):
+    """从SQLite目录或JSON文件读取课表，返回parse_schedule_data的结果"""
+    if SQLiteCatalogStore.is_store_file(filename):
+        with SQLiteCatalogStore(filename) as store:
+            import_data = store.load(progress)
+    elif progress is None:
+        with open(filename, "r", encoding="utf-8") as f:
+            import_data = json.load(f)
+    else:
+        # 分块读取以便报告进度和及时取消
+        size = os.path.getsize(filename)
+        chunks = []
+        with open(filename, "rb") as f:
+            while True:
+                progress("读取文件", f.tell(), size)
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        progress("解析JSON", 0, 1)
+        import_data = json.loads(b"".join(chunks).decode("utf-8"))
+    return parse_schedule_data(import_data, progress)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""按周的课表网格、整个学期的总体课表和当日课程查询"""
+
+from .conflict import PERIOD_BITS
+from .model import Weekday
+
+
+class WeekGridCache:
+    """按周缓存渲染好的课表网格（节次 × 星期 的单元格文本）
+
+    已选课程的版本或周次范围变化时整体失效；切换周次时直接取出缓存的网格。
+    """
+
+    def __init__(self, periods, day_count=7):
+        self.periods = list(periods)
+        self.day_count = day_count
+        self.grids = {}  # week -> ((单元格文本, ...), ...)，每行对应一个节次
+        self._key = None
+        self._by_week = None  # week -> [(课程名, 星期列, 节次列表), ...]，按选课顺序
+
+    def sync(self, selection, week_range):
+        """已选课程或周次范围变化时清空缓存"""
+        key = (selection.version, tuple(week_range))
+        if key != self._key:
+            self._key = key
+            self.grids.clear()
+            self._by_week = None
+
+    def get(self, week, selection, week_range):
+        """取出指定周的网格，缺失时计算并缓存"""
+        self.sync(selection, week_range)
+        grid = self.grids.get(week)
+        if grid is None:
+            grid = self.grids[week] = self._build(week, selection)
+        return grid
+
+    def _build(self, week, selection):
+        if self._by_week is None:
+            # 按周次归类一次已选课程的时间安排，之后每周的网格只处理本周的记录
+            self._by_week = {}
+            for course in selection:
+                for schedule in course.get("schedule_info") or []:
+                    day_num = Weekday.from_name(schedule["day"]).to_column_index()
+                    self._by_week.setdefault(schedule["week"], []).append(
+                        (course["name"], day_num, schedule["periods"] or []))
+
+        row_index = {period: index for index, period in enumerate(self.periods)}
+        cells = [[[] for _ in range(self.day_count)] for _ in self.periods]
+        for name, day_num, periods in self._by_week.get(week, ()):
+            for period in periods:
+                if 1 <= period <= 10:  # 确保节次在有效范围内
+                    row = row_index.get(period)
+                    if row is not None:
+                        cells[row][day_num - 1].append(name)
+        return tuple(tuple(" | ".join(names) for names in row) for row in cells)
+
+
+class TermOverview:
+    """整个学期的总体课表：按(星期, 节次)汇总周次范围内所有周的已选课程
+
+    把已选课程的占用位图一次展开为 (课程, 周次, 星期, 节次) 的布尔张量，再沿各轴求和，
+    不逐条遍历时间安排：
+    - counts[星期下标, 节次-1]：该时间有课的周数
+    - conflict_counts：该时间有两门及以上课程的周数
+    weeks、conflict_weeks、course_names返回某个单元格的周次列表和课程名称。需要numpy。
+    """
+
+    def __init__(self, selection, week_range, period_count=PERIOD_BITS):
+        import numpy as np
+
+        self.first_week, self.last_week = week_range
+        self.period_count = period_count
+        week_count = self.last_week - self.first_week + 1
+        courses, masks = zip(*selection.masks()) if len(selection) else ((), ())
+        self.courses = list(courses)
+
+        # 位图第0位为溢出位，之后每周7天、每天PERIOD_BITS位；只取到最后一周
+        bit_count = 1 + (self.last_week + 1) * 7 * PERIOD_BITS
+        byte_count = (bit_count + 7) // 8
+        limit = (1 << bit_count) - 1
+        buffer = b"".join((mask & limit).to_bytes(byte_count, "little") for mask in masks)
+        bits = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8).reshape(len(masks), byte_count),
+                             axis=1, bitorder="little")
+        tensor = bits[:, 1:bit_count].reshape(len(masks), self.last_week + 1, 7, PERIOD_BITS)
+        tensor = tensor[:, self.first_week:, :, :period_count].astype(bool)  # (课程, 周, 星期, 节次)
+
+        per_slot = tensor.sum(axis=0, dtype=np.int32)  # (周, 星期, 节次) 的课程数
+        self.occupied = per_slot > 0
+        self.conflicting = per_slot > 1
+        self.counts = self.occupied.sum(axis=0)
+        self.conflict_counts = self.conflicting.sum(axis=0)
+        self.course_cells = tensor.any(axis=1)  # (课程, 星期, 节次)
+        self.week_count = week_count
+        self.max_count = int(self.counts.max()) if self.counts.size else 0
+        self._np = np
+
+    def weeks(self, day_index, period):
+        """该单元格有课的周次列表"""
+        return [self.first_week + int(i) for i in self._np.flatnonzero(self.occupied[:, day_index, period - 1])]
+
+    def conflict_weeks(self, day_index, period):
+        """该单元格有冲突的周次列表"""
+        return [self.first_week + int(i)
+                for i in self._np.flatnonzero(self.conflicting[:, day_index, period - 1])]
+
+    def course_names(self, day_index, period):
+        """在该单元格上过课的课程名称（按选课顺序，不重复）"""
+        names = [self.courses[int(i)]["name"] for i in self._np.flatnonzero(self.course_cells[:, day_index, period - 1])]
+        return list(dict.fromkeys(names))
+
+
+def courses_on_day(courses, week, day_name):
+    """收集指定周次、星期的课程，按节次排序"""
+    day_courses = []
+    for course in courses:
+        if "schedule_info" in course:
+            for schedule in course["schedule_info"]:
+                if schedule["day"] == day_name and schedule["week"] == week:
+                    day_courses.append({
+                        "name": course["name"],
+                        "teacher": course["teacher"],
+                        "periods": schedule["periods"],
+                        "location": course["location"]
+                    })
+    
+    # 按节次排序
+    day_courses.sort(key=lambda x: min(x["periods"]) if x["periods"] else 0)
+    return day_courses
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""可选的性能追踪：记录方法调用的耗时区间，导出为Chrome trace（Perfetto）JSON
+
+默认不启用，不影响正常运行。启用后用instrument替换类中的方法，每次调用记录一个区间；
+嵌套调用形成嵌套区间，在chrome://tracing或ui.perfetto.dev中打开导出的文件即可查看。
+"""
+
+import collections
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# 启用追踪的环境变量和命令行参数，值为导出文件路径（环境变量为"1"或参数不带值时使用默认路径）
+TRACE_ENV = "COURSE_SCHEDULE_TRACE"
+TRACE_OPTION = "--trace"
+
+
+def trace_output(argv, environ=os.environ):
+    """根据命令行参数和环境变量决定是否启用追踪，返回导出文件路径，不启用时返回None
+
+    支持 --trace、--trace 文件名、--trace=文件名 三种写法，命令行参数优先于环境变量。
+    """
+    default = time.strftime("course-schedule-trace-%Y%m%d-%H%M%S.json")
+    for index, argument in enumerate(argv):
+        if argument.startswith(TRACE_OPTION + "="):
+            return argument.split("=", 1)[1] or default
+        if argument == TRACE_OPTION:
+            following = argv[index + 1] if index + 1 < len(argv) else ""
+            return following if following and not following.startswith("-") else default
+    value = environ.get(TRACE_ENV, "")
+    if value in ("", "0"):
+        return None
+    return default if value == "1" else value
+
+
+class Tracer:
+    """记录耗时区间
+
+    events保存全部区间（最多max_events个，超出后只计数），recent保存最近的recent_count个，
+    供界面显示最慢的操作。时间以微秒为单位，从创建Tracer时开始计。
+    """
+
+    def __init__(self, max_events=200000, recent_count=500):
+        self.origin = time.perf_counter()
+        self.max_events = max_events
+        self.events = []  # [(名称, 分类, 开始, 耗时, 线程id), ...]
+        self.recent = collections.deque(maxlen=recent_count)  # [(名称, 耗时), ...]
+        self.dropped = 0  # 超出max_events未保存的区间数
+        self._lock = threading.Lock()
+
+    def record(self, name, category, start, end):
+        """记录一个区间，start和end为time.perf_counter()的值"""
+        start_us = (start - self.origin) * 1e6
+        duration_us = (end - start) * 1e6
+        with self._lock:
+            if len(self.events) < self.max_events:
+                self.events.append((name, category, start_us, duration_us, threading.get_ident()))
+            else:
+                self.dropped += 1
+            self.recent.append((name, duration_us))
+
+    @contextlib.contextmanager
+    def span(self, name, category="app"):
+        """记录with块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter())
+
+    def wrap(self, function, name=None, category="app"):
+        """返回记录每次调用耗时的函数"""
+        name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, category, start, time.perf_counter())
+
+        traced.__traced__ = True
+        return traced
+
+    def instrument(self, cls, category, names=None):
+        """替换类中的方法，之后创建和已有的实例调用这些方法时都会记录区间
+
+        names为None时替换类中定义的所有公开方法和__init__；已经替换过的方法不重复替换。
+        必须在界面按钮等保存绑定方法之前调用。
+        """
+        if names is None:
+            names = [name for name, value in vars(cls).items()
+                     if callable(value) and not isinstance(value, (staticmethod, classmethod, type))
+                     and (not name.startswith("_") or name == "__init__")]
+        for name in names:
+            function = vars(cls).get(name)
+            if function is None or getattr(function, "__traced__", False):
+                continue
+            setattr(cls, name, self.wrap(function, f"{cls.__name__}.{name}", category))
+
+    def slowest(self, count=10):
+        """最近的区间中按名称统计，返回最慢的count个 [(名称, 最长耗时ms, 平均耗时ms, 次数), ...]"""
+        with self._lock:
+            recent = list(self.recent)
+        stats = {}
+        for name, duration in recent:
+            longest, total, calls = stats.get(name, (0.0, 0.0, 0))
+            stats[name] = (max(longest, duration), total + duration, calls + 1)
+        ranked = sorted(stats.items(), key=lambda item: item[1][0], reverse=True)[:count]
+        return [(name, longest / 1000, total / calls / 1000, calls) for name, (longest, total, calls) in ranked]
+
+    def to_chrome_trace(self):
+        """转换为Chrome trace格式的字典"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+        trace_events = [
+            {"name": name, "cat": category, "ph": "X", "ts": round(start, 3), "dur": round(duration, 3),
+             "pid": pid, "tid": tid}
+            for name, category, start, duration, tid in events
+        ]
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped}}
+
+    def export(self, filename):
+        """写出Chrome trace JSON文件"""
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(self.to_chrome_trace(), file, ensure_ascii=False)
+        return filename
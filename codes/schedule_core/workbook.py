@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""导出Excel课表：总体课表、每周课表和每门课程的课表
+
+用openpyxl的只写模式（write_only）逐行写出工作表，每张表写完立即关闭，写出的行不再保留在内存中，
+内存中只留下各工作表的少量元数据。时间安排直接使用课程压缩后的WeekPattern（星期、节次、周次位图），
+不展开为逐周记录。同一列中相邻节次内容相同的单元格合并为一个。需要openpyxl。
+"""
+
+from .conflict import DAY_INDEX
+from .model import Weekday, format_weeks
+from .storage import atomic_write
+
+DAY_LABELS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+DEFAULT_PERIOD_COUNT = 8  # 没有更晚的课程时也至少显示的节次数
+SHEET_TITLE_LENGTH = 31  # Excel工作表名称的最大长度
+INVALID_TITLE_CHARS = str.maketrans({char: "_" for char in "[]:*?/\\"})
+
+
+def _sheet_title(title, used):
+    """生成合法且不重复的工作表名称"""
+    title = title.translate(INVALID_TITLE_CHARS)[:SHEET_TITLE_LENGTH] or "课程"
+    candidate = title
+    number = 2
+    while candidate.lower() in used:
+        suffix = f"({number})"
+        candidate = title[:SHEET_TITLE_LENGTH - len(suffix)] + suffix
+        number += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _course_entries(courses):
+    """展开为 [(课程, 星期下标, 节次元组, 周次位图), ...]，无法识别的星期和周次忽略
+
+    无法压缩为WeekPattern的课程（周次为字符串、同一周重复出现等，只保留逐周的schedule_info）
+    按(星期, 节次)分组，把能转换为整数的周次合并为位图。
+    """
+    entries = []
+    for course in courses:
+        patterns = course.patterns
+        if patterns is not None:
+            for pattern in patterns:
+                if isinstance(pattern.weekday, Weekday):
+                    entries.append((course, pattern.weekday.value - 1, pattern.periods, pattern.weeks))
+            continue
+        groups = {}
+        for schedule in course.get("schedule_info") or []:
+            day = DAY_INDEX.get(schedule["day"])
+            try:
+                week = int(schedule["week"])
+            except (ValueError, TypeError):
+                continue
+            if day is None or week < 0:
+                continue
+            key = (day, tuple(schedule["periods"]))
+            groups[key] = groups.get(key, 0) | 1 << week
+        entries.extend((course, day, periods, weeks) for (day, periods), weeks in groups.items())
+    return entries
+
+
+class _GridWriter:
+    """把 节次 × 星期 的网格逐行写入只写工作表，并合并同一列中相邻的相同单元格"""
+
+    def __init__(self, workbook, periods):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+        from openpyxl.utils import get_column_letter
+
+        self.workbook = workbook
+        self.periods = periods
+        self.WriteOnlyCell = WriteOnlyCell
+        self.get_column_letter = get_column_letter
+
+        # 样式注册为命名样式，每个单元格只按名称引用，不必逐个比较边框、填充等样式对象
+        side = Side(style="thin", color="A0A0A0")
+        border = Border(left=side, right=side, top=side, bottom=side)
+        alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        for name, font, fill in (("课表标题", Font(bold=True), PatternFill("solid", fgColor="DDEBF7")),
+                                 ("课表课程", Font(), PatternFill("solid", fgColor="FFF2CC")),
+                                 ("课表空白", Font(), PatternFill())):
+            workbook.add_named_style(NamedStyle(name, font=font, fill=fill, border=border, alignment=alignment))
+
+    def _cell(self, sheet, value, header=False):
+        cell = self.WriteOnlyCell(sheet, value=value)
+        cell.style = "课表标题" if header else "课表课程" if value else "课表空白"
+        return cell
+
+    def write(self, title, rows, heading=None):
+        """新建名为title的工作表，heading为网格之前的说明行，rows为每个节次一行的单元格文本"""
+        sheet = self.workbook.create_sheet(title)
+        # 只写模式下列宽必须在写入第一行之前设置
+        sheet.column_dimensions["A"].width = 8
+        for column in range(2, len(DAY_LABELS) + 2):
+            sheet.column_dimensions[self.get_column_letter(column)].width = 24
+
+        first_row = 1
+        for line in heading or ():
+            sheet.append([self.WriteOnlyCell(sheet, value=value) for value in line])
+            first_row += 1
+        sheet.append([self._cell(sheet, "节次", True)] + [self._cell(sheet, day, True) for day in DAY_LABELS])
+        first_row += 1
+
+        # 先找出每列中内容相同的连续单元格，合并区域只保留左上角的值
+        merged = set()
+        for column in range(len(DAY_LABELS)):
+            start = 0
+            for row in range(1, len(rows) + 1):
+                if row < len(rows) and rows[row][column] and rows[row][column] == rows[start][column]:
+                    continue
+                if row - start > 1:
+                    letter = self.get_column_letter(column + 2)
+                    sheet.merged_cells.add(f"{letter}{first_row + start}:{letter}{first_row + row - 1}")
+                    merged.update((index, column) for index in range(start + 1, row))
+                start = row
+
+        for row, (period, texts) in enumerate(zip(self.periods, rows)):
+            sheet.append([self._cell(sheet, period, True)] +
+                         [self._cell(sheet, None if (row, column) in merged else text or None)
+                          for column, text in enumerate(texts)])
+        # 立即写出表尾（包括合并区域）并关闭临时文件，不必等到保存工作簿时同时打开所有工作表
+        sheet.close()
+        return sheet
+
+    def empty_rows(self):
+        return [[[] for _ in DAY_LABELS] for _ in self.periods]
+
+
+def save_schedule_xlsx(filename, selected_electives, week_range, periods=None, progress=None):
+    """把已选课程导出为Excel工作簿
+
+    - 总体课表：每个(星期, 节次)上课的课程及其周次，如"高等数学（1-16周）"
+    - 每周一张课表：第N周
+    - 每门课程一张课表：单元格中为该时间上课的周次
+    periods为导出的节次列表，默认为1至最晚的节次（至少8节）。
+    先写入临时文件再替换（atomic_write）；progress同save_schedule，可用于取消。
+    """
+    from openpyxl import Workbook
+
+    selected_electives = list(selected_electives)
+    first_week, last_week = week_range
+    range_mask = sum(1 << week for week in range(first_week, last_week + 1))
+    entries = [(course, day, course_periods, weeks & range_mask)
+               for course, day, course_periods, weeks in _course_entries(selected_electives)]
+    if periods is None:
+        latest = max((period for _, _, course_periods, weeks in entries if weeks for period in course_periods),
+                     default=DEFAULT_PERIOD_COUNT)
+        periods = range(1, max(latest, DEFAULT_PERIOD_COUNT) + 1)
+    periods = list(periods)
+    row_index = {period: row for row, period in enumerate(periods)}
+    week_count = last_week - first_week + 1
+    total = 1 + week_count + len(selected_electives)
+
+    def report(stage, done):
+        if progress is not None:
+            progress(stage, done, total)
+
+    def write(temp_name):
+        workbook = Workbook(write_only=True)
+        grid = _GridWriter(workbook, periods)
+        used = set()
+
+        # 总体课表：每个单元格中各课程的周次位图
+        report("写入总体课表", 0)
+        cells = [[{} for _ in DAY_LABELS] for _ in periods]
+        for course, day, course_periods, weeks in entries:
+            if not weeks:
+                continue
+            for period in course_periods:
+                row = row_index.get(period)
+                if row is not None:
+                    names = cells[row][day]
+                    names[course["name"]] = names.get(course["name"], 0) | weeks
+        rows = [["\n".join(f"{name}（{format_weeks(weeks)}周）" for name, weeks in names.items())
+                 for names in row] for row in cells]
+        grid.write(_sheet_title("总体课表", used), rows,
+                   heading=[[f"总体课表（第{first_week}-{last_week}周）"]])
+
+        # 每周课表：只检查周次位图，不展开时间安排
+        for index, week in enumerate(range(first_week, last_week + 1)):
+            report("写入每周课表", 1 + index)
+            bit = 1 << week
+            cells = grid.empty_rows()
+            for course, day, course_periods, weeks in entries:
+                if weeks & bit:
+                    for period in course_periods:
+                        row = row_index.get(period)
+                        if row is not None:
+                            cells[row][day].append(course["name"])
+            grid.write(_sheet_title(f"第{week}周", used), [[" | ".join(names) for names in row] for row in cells])
+
+        # 每门课程的课表：单元格中为该时间上课的周次
+        by_course = {}
+        for course, day, course_periods, weeks in entries:
+            by_course.setdefault(id(course), []).append((day, course_periods, weeks))
+        for index, course in enumerate(selected_electives):
+            report("写入课程课表", 1 + week_count + index)
+            cells = [[0] * len(DAY_LABELS) for _ in periods]
+            for day, course_periods, weeks in by_course.get(id(course), ()):
+                for period in course_periods:
+                    row = row_index.get(period)
+                    if row is not None:
+                        cells[row][day] |= weeks
+            rows = [[f"第{format_weeks(weeks)}周" if weeks else "" for weeks in row] for row in cells]
+            heading = [["课程", course["name"]], ["教师", course.get("teacher", "未知教师")],
+                       ["地点", course.get("location", "未知地点")]]
+            grid.write(_sheet_title(course["name"], used), rows, heading=heading)
+
+        report("保存文件", total)
+        workbook.save(temp_name)
+
+    atomic_write(filename, write)